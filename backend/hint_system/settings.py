@@ -1,177 +1,241 @@
-import os
-from pathlib import Path
-from dotenv import load_dotenv
-
-# Load environment variables from .env file
-load_dotenv()
-
-# Build paths inside the project like this: BASE_DIR / 'subdir'.
-BASE_DIR = Path(__file__).resolve().parent.parent
-
-# SECURITY WARNING: keep the secret key used in production secret!
-SECRET_KEY = 'django-insecure-your-secret-key-here'
-OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
-# LangSmith API Key - try both variable names for compatibility
-LANGSMITH_API_KEY = os.getenv('LANGSMITH_API_KEY') or os.getenv('LANGCHAIN_API_KEY')
-
-# LangSmith Configuration
-LANGSMITH_PROJECT = os.getenv('LANGSMITH_PROJECT', 'hint-generation-system')
-LANGSMITH_TRACING_V2 = os.getenv('LANGSMITH_TRACING_V2', 'true').lower() == 'true'
-LANGSMITH_ENDPOINT = os.getenv('LANGSMITH_ENDPOINT', 'https://api.smith.langchain.com')
-# SECURITY WARNING: don't run with debug turned on in production!
-DEBUG = True
-
-ALLOWED_HOSTS = []
-
-# Application definition
-INSTALLED_APPS = [
-    'django.contrib.admin',
-    'django.contrib.auth',
-    'django.contrib.contenttypes',
-    'django.contrib.sessions',
-    'django.contrib.messages',
-    'django.contrib.staticfiles',
-    # Third party apps
-    'rest_framework',
-    'corsheaders',
-    'channels',
-    # Local app
-    'hints',
-]
-
-MIDDLEWARE = [
-    'django.middleware.security.SecurityMiddleware',
-    'django.contrib.sessions.middleware.SessionMiddleware',
-    'corsheaders.middleware.CorsMiddleware',
-    'django.middleware.common.CommonMiddleware',
-    'django.middleware.csrf.CsrfViewMiddleware',
-    'django.contrib.auth.middleware.AuthenticationMiddleware',
-    'django.contrib.messages.middleware.MessageMiddleware',
-    'django.middleware.clickjacking.XFrameOptionsMiddleware',
-]
-
-ROOT_URLCONF = 'hint_system.urls'
-
-TEMPLATES = [
-    {
-        'BACKEND': 'django.template.backends.django.DjangoTemplates',
-        'DIRS': [],
-        'APP_DIRS': True,
-        'OPTIONS': {
-            'context_processors': [
-                'django.template.context_processors.debug',
-                'django.template.context_processors.request',
-                'django.contrib.auth.context_processors.auth',
-                'django.contrib.messages.context_processors.messages',
-            ],
-        },
-    },
-]
-
-WSGI_APPLICATION = 'hint_system.wsgi.application'
-ASGI_APPLICATION = 'hint_system.asgi.application'
-
-# Database
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.sqlite3',
-        'NAME': BASE_DIR / 'db.sqlite3',
-    }
-}
-
-# Password validation
-AUTH_PASSWORD_VALIDATORS = [
-    {
-        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
-    },
-    {
-        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
-    },
-]
-
-# Internationalization
-LANGUAGE_CODE = 'en-us'
-TIME_ZONE = 'UTC'
-USE_I18N = True
-USE_TZ = True
-
-# Static files (CSS, JavaScript, Images)
-STATIC_URL = 'static/'
-
-# Default primary key field type
-DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
-
-# REST Framework settings
-REST_FRAMEWORK = {
-    'DEFAULT_AUTHENTICATION_CLASSES': [],
-    'DEFAULT_PERMISSION_CLASSES': [],
-}
-
-# CORS settings
-CORS_ALLOWED_ORIGINS = [
-    "http://localhost:3000",
-    "http://127.0.0.1:3000",
-]
-
-# Channel layers for WebSocket
-CHANNEL_LAYERS = {
-    'default': {
-        'BACKEND': 'channels.layers.InMemoryChannelLayer'
-    }
-}
-
-# Logging configuration
-LOGGING = {
-    'version': 1,
-    'disable_existing_loggers': False,
-    'formatters': {
-        'verbose': {
-            'format': '[{asctime}] {levelname} {name} {message}',
-            'style': '{',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
-        },
-        'simple': {
-            'format': '[{asctime}] {levelname} {message}',
-            'style': '{',
-            'datefmt': '%Y-%m-%d %H:%M:%S'
-        },
-    },
-    'handlers': {
-        'console': {
-            'class': 'logging.StreamHandler',
-            'formatter': 'verbose',
-        },
-    },
-    'root': {
-        'handlers': ['console'],
-        'level': 'INFO',
-    },
-    'loggers': {
-        'hints': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-        'hints.views': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-        'hints.hint_chain': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-        'hints.rag_service': {
-            'handlers': ['console'],
-            'level': 'INFO',
-            'propagate': False,
-        },
-    },
+import os
+from pathlib import Path
+from dotenv import load_dotenv
+
+# Load environment variables from .env file
+load_dotenv()
+
+# Build paths inside the project like this: BASE_DIR / 'subdir'.
+BASE_DIR = Path(__file__).resolve().parent.parent
+
+# SECURITY WARNING: keep the secret key used in production secret!
+SECRET_KEY = 'django-insecure-your-secret-key-here'
+OPENROUTER_API_KEY = os.getenv('OPENROUTER_API_KEY')
+# LangSmith API Key - try both variable names for compatibility
+LANGSMITH_API_KEY = os.getenv('LANGSMITH_API_KEY') or os.getenv('LANGCHAIN_API_KEY')
+
+# LangSmith Configuration
+LANGSMITH_PROJECT = os.getenv('LANGSMITH_PROJECT', 'hint-generation-system')
+LANGSMITH_TRACING_V2 = os.getenv('LANGSMITH_TRACING_V2', 'true').lower() == 'true'
+LANGSMITH_ENDPOINT = os.getenv('LANGSMITH_ENDPOINT', 'https://api.smith.langchain.com')
+# When true, hint requests block until the hint evaluation finishes and the
+# response includes the scores; when false (default) the hint is returned
+# immediately and the evaluation is persisted in the background
+SYNC_EVALUATION = os.getenv('SYNC_EVALUATION', 'false').lower() == 'true'
+# When true, request_hint packs attempt evaluation, hint generation and
+# hint self-evaluation into one LLM roundtrip instead of three separate
+# calls; trades the RAG retrieval path for latency and token cost
+SINGLE_CALL_WORKFLOW = os.getenv('SINGLE_CALL_WORKFLOW', 'false').lower() == 'true'
+# When true, concurrent attempt evaluations are coalesced into one
+# indexed LLM call by a 50ms micro-batcher (classroom burst traffic)
+BATCH_ATTEMPT_EVALUATION = os.getenv('BATCH_ATTEMPT_EVALUATION', 'false').lower() == 'true'
+# Same micro-batching for the hint evaluation scoring calls
+BATCH_HINT_EVALUATION = os.getenv('BATCH_HINT_EVALUATION', 'false').lower() == 'true'
+# When true, a hint is generated speculatively at the current level while
+# the attempt evaluation is still in flight; hits overlap the two LLM
+# roundtrips, misses cost one discarded generation call
+SPECULATIVE_HINT_GENERATION = os.getenv('SPECULATIVE_HINT_GENERATION', 'false').lower() == 'true'
+# Per-operation model routing. Hint generation keeps the strongest
+# model; the narrow scoring/decision calls (hint evaluation,
+# auto-trigger) can be pointed at a smaller, faster model via FAST_MODEL
+# since they return a handful of structured fields
+DEFAULT_MODEL = os.getenv('DEFAULT_MODEL', 'deepseek/deepseek-r1-0528-qwen3-8b:free')
+FAST_MODEL = os.getenv('FAST_MODEL', DEFAULT_MODEL)
+ATTEMPT_EVALUATION_MODEL = os.getenv('ATTEMPT_EVALUATION_MODEL', 'qwen/qwen-2.5-coder-32b-instruct:free')
+# Max concurrent in-flight calls per upstream model - keeps burst
+# traffic below OpenRouter's per-model rate limit instead of triggering
+# 429 retry storms
+PER_MODEL_CONCURRENCY = int(os.getenv('PER_MODEL_CONCURRENCY', '8'))
+# When true (default), low-temperature LLM calls go through an
+# exact-match response cache keyed on (model, rendered input) so repeated
+# identical submissions skip the OpenRouter roundtrip entirely
+ENABLE_PROMPT_CACHE = os.getenv('ENABLE_PROMPT_CACHE', 'true').lower() == 'true'
+# Log verbosity for the hints app loggers; raise to WARNING in production
+# so the hot request path skips log formatting entirely
+LOG_LEVEL = os.getenv('LOG_LEVEL', 'INFO')
+# When true, the shared HintChain is built at process start (no cold-start
+# delay on the first hint request); disable for management-command-heavy
+# workflows where the LLM stack isn't needed
+PRELOAD_HINT_CHAIN = os.getenv('PRELOAD_HINT_CHAIN', 'false').lower() == 'true'
+
+# SECURITY WARNING: don't run with debug turned on in production!
+DEBUG = True
+
+ALLOWED_HOSTS = []
+
+# Application definition
+INSTALLED_APPS = [
+    'django.contrib.admin',
+    'django.contrib.auth',
+    'django.contrib.contenttypes',
+    'django.contrib.sessions',
+    'django.contrib.messages',
+    'django.contrib.staticfiles',
+    # Third party apps
+    'rest_framework',
+    'corsheaders',
+    'channels',
+    # Local app
+    'hints',
+]
+
+MIDDLEWARE = [
+    'django.middleware.security.SecurityMiddleware',
+    'django.contrib.sessions.middleware.SessionMiddleware',
+    'corsheaders.middleware.CorsMiddleware',
+    'django.middleware.common.CommonMiddleware',
+    'django.middleware.csrf.CsrfViewMiddleware',
+    'django.contrib.auth.middleware.AuthenticationMiddleware',
+    'django.contrib.messages.middleware.MessageMiddleware',
+    'django.middleware.clickjacking.XFrameOptionsMiddleware',
+]
+
+ROOT_URLCONF = 'hint_system.urls'
+
+TEMPLATES = [
+    {
+        'BACKEND': 'django.template.backends.django.DjangoTemplates',
+        'DIRS': [],
+        'APP_DIRS': True,
+        'OPTIONS': {
+            'context_processors': [
+                'django.template.context_processors.debug',
+                'django.template.context_processors.request',
+                'django.contrib.auth.context_processors.auth',
+                'django.contrib.messages.context_processors.messages',
+            ],
+        },
+    },
+]
+
+WSGI_APPLICATION = 'hint_system.wsgi.application'
+ASGI_APPLICATION = 'hint_system.asgi.application'
+
+# Database
+DATABASES = {
+    'default': {
+        'ENGINE': 'django.db.backends.sqlite3',
+        'NAME': BASE_DIR / 'db.sqlite3',
+        # Persistent connections: reuse the handle (and its WAL/PRAGMA
+        # setup) across requests instead of reopening per request; the
+        # payoff grows when this moves to a networked database
+        'CONN_MAX_AGE': int(os.getenv('DB_CONN_MAX_AGE', '600')),
+    }
+}
+
+# Cache backend. Everything the app caches - LLM responses, whole hint
+# results, problem rows, auto-trigger verdicts - goes through this. The
+# default local-memory backend is per-process, so under multiple workers
+# each process warms its own cache and identical submissions miss across
+# workers; point REDIS_URL at a Redis instance to share one cache (and
+# the single-flight dedup benefits) cluster-wide
+REDIS_URL = os.getenv('REDIS_URL')
+if REDIS_URL:
+    CACHES = {
+        'default': {
+            'BACKEND': 'django.core.cache.backends.redis.RedisCache',
+            'LOCATION': REDIS_URL,
+        }
+    }
+
+# Password validation
+AUTH_PASSWORD_VALIDATORS = [
+    {
+        'NAME': 'django.contrib.auth.password_validation.UserAttributeSimilarityValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.MinimumLengthValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.CommonPasswordValidator',
+    },
+    {
+        'NAME': 'django.contrib.auth.password_validation.NumericPasswordValidator',
+    },
+]
+
+# Internationalization
+LANGUAGE_CODE = 'en-us'
+TIME_ZONE = 'UTC'
+USE_I18N = True
+USE_TZ = True
+
+# Static files (CSS, JavaScript, Images)
+STATIC_URL = 'static/'
+
+# Default primary key field type
+DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
+
+# REST Framework settings
+REST_FRAMEWORK = {
+    'DEFAULT_AUTHENTICATION_CLASSES': [],
+    'DEFAULT_PERMISSION_CLASSES': [],
+    # orjson-backed responses; the browsable API stays available for dev
+    'DEFAULT_RENDERER_CLASSES': [
+        'hints.renderers.ORJSONRenderer',
+        'rest_framework.renderers.BrowsableAPIRenderer',
+    ],
+}
+
+# CORS settings
+CORS_ALLOWED_ORIGINS = [
+    "http://localhost:3000",
+    "http://127.0.0.1:3000",
+]
+
+# Channel layers for WebSocket
+CHANNEL_LAYERS = {
+    'default': {
+        'BACKEND': 'channels.layers.InMemoryChannelLayer'
+    }
+}
+
+# Logging configuration
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'verbose': {
+            'format': '[{asctime}] {levelname} {name} {message}',
+            'style': '{',
+            'datefmt': '%Y-%m-%d %H:%M:%S'
+        },
+        'simple': {
+            'format': '[{asctime}] {levelname} {message}',
+            'style': '{',
+            'datefmt': '%Y-%m-%d %H:%M:%S'
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': 'verbose',
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'hints': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'hints.views': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'hints.hint_chain': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+        'hints.rag_service': {
+            'handlers': ['console'],
+            'level': LOG_LEVEL,
+            'propagate': False,
+        },
+    },
 } 
\ No newline at end of file
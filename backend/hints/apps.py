@@ -1,6 +1,45 @@
 from django.apps import AppConfig
+from django.db.backends.signals import connection_created
+from django.dispatch import receiver
+
+
+@receiver(connection_created)
+def _tune_sqlite(sender, connection, **kwargs):
+    """
+    Apply per-connection SQLite PRAGMAs.
+
+    WAL lets readers proceed while a writer holds the log, which matters
+    here because hint requests, background evaluation writes and the
+    auto-trigger poller all hit the same database. busy_timeout makes
+    writers queue briefly instead of raising 'database is locked'.
+    """
+    if connection.vendor != 'sqlite':
+        return
+    with connection.cursor() as cursor:
+        cursor.execute('PRAGMA journal_mode=WAL;')
+        cursor.execute('PRAGMA synchronous=NORMAL;')
+        cursor.execute('PRAGMA busy_timeout=30000;')
+        cursor.execute('PRAGMA temp_store=MEMORY;')
+        cursor.execute('PRAGMA mmap_size=268435456;')
 
 
 class HintsConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'hints'
+
+    def ready(self):
+        from django.conf import settings
+        if not settings.PRELOAD_HINT_CHAIN:
+            return
+        # Build the shared HintChain at process start so the first request
+        # doesn't pay for prompt compilation and HTTP client construction
+        from .views import get_hint_chain
+        try:
+            get_hint_chain()
+        except Exception as e:
+            # Misconfiguration (e.g. missing API key) surfaces on first
+            # use instead of blocking startup and management commands
+            import logging
+            logging.getLogger(__name__).warning(
+                "⚠️  HintChain warm-up failed, will retry on first request: %s", e
+            )
@@ -1,696 +1,1660 @@
-import os
-import logging
-import json
-import re
-from typing import Dict, Any, List, Optional, Tuple
-from django.conf import settings
-
-# LangChain imports
-from langchain_core.runnables import RunnablePassthrough, RunnableLambda
-from langchain_core.prompts import PromptTemplate
-from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
-from langchain_openai import ChatOpenAI
-
-# Local imports
-from .rag_service import RAGService
-
-logger = logging.getLogger(__name__)
-
-class HintChain:
-    def __init__(self):
-        logger.info("🚀 Initializing HintChain...")
-        
-        self.api_key = settings.OPENROUTER_API_KEY
-        self.langsmith_api_key = settings.LANGSMITH_API_KEY
-        
-        # Configure LangSmith
-        if self.langsmith_api_key:
-            os.environ["LANGCHAIN_API_KEY"] = self.langsmith_api_key
-            os.environ["LANGCHAIN_PROJECT"] = settings.LANGSMITH_PROJECT
-            os.environ["LANGCHAIN_TRACING_V2"] = str(settings.LANGSMITH_TRACING_V2)
-            os.environ["LANGCHAIN_ENDPOINT"] = settings.LANGSMITH_ENDPOINT
-        
-        # Model configurations for different operations
-        self.model_configs = {
-            'attempt_evaluation': {
-                'model': 'qwen/qwen-2.5-coder-32b-instruct:free',
-                'temperature': 0.3,  # Lower temperature for more precise evaluation
-                'description': 'Attempt Evaluation Model'
-            },
-            'hint_generation': {
-                'model': 'deepseek/deepseek-r1-0528-qwen3-8b:free',
-                'temperature': 0.7,  # Higher temperature for creative hint generation
-                'description': 'Hint Generation Model'
-            },
-            'hint_evaluation': {
-                'model': 'deepseek/deepseek-r1-0528-qwen3-8b:free',
-                'temperature': 0.2,  # Very low temperature for consistent scoring
-                'description': 'Hint Evaluation Model'
-            },
-            'auto_trigger': {
-                'model': 'deepseek/deepseek-r1-0528-qwen3-8b:free',
-                'temperature': 0.4,  # Medium temperature for balanced decision making
-                'description': 'Auto-Trigger Decision Model'
-            }
-        }
-        
-        # Initialize LLM instances for each operation
-        self.llms = {}
-        for operation, config in self.model_configs.items():
-            self.llms[operation] = ChatOpenAI(
-                model=config['model'],
-                openai_api_key=self.api_key,
-                openai_api_base="https://openrouter.ai/api/v1",
-                temperature=config['temperature']
-            )
-            logger.info(f"✅ Initialized {config['description']}: {config['model']} (temp: {config['temperature']})")
-        
-        # Initialize output parsers
-        self.str_parser = StrOutputParser()
-        self.json_parser = JsonOutputParser()
-        
-        # Initialize RAG service
-        self.rag_service = RAGService()
-        
-        # Build the chains
-        self._build_chains()
-        
-        logger.info("✅ HintChain initialized successfully")
-
-    def _build_chains(self):
-        """Build all the LangChain components with superior prompts and parsing"""
-        
-        # 1. Attempt Evaluation Chain - Enhanced with Error Pattern Classification
-        attempt_eval_prompt = PromptTemplate.from_template("""
-        Problem Description: {problem_description}
-        
-        User's Code:
-        {user_code}
-        
-        Please analyze if this code would solve the problem correctly. Consider:
-        1. Logic correctness
-        2. Edge cases
-        3. Time and space complexity
-        4. Code quality
-        
-        Respond in the following format:
-        success: [true/false]
-        reason: [brief explanation]
-        complexity: [time and space complexity]
-        edge_cases: [list of edge cases handled or missed]
-        code_quality: [assessment of code quality]
-        suggestions: [specific suggestions for improvement]
-        error_pattern: [classify the main error pattern - choose from: time_complexity, logic_error, edge_case_missing, wrong_approach, syntax_error, boundary_condition, data_structure_misuse, algorithm_choice, null_pointer, index_error, type_error, or other]
-        error_category: [categorize the error - choose from: performance, correctness, completeness, or other]
-        
-        Example response:
-        success: false
-        reason: The code doesn't handle the case where no solution exists
-        complexity: O(n) time, O(1) space
-        edge_cases: Missing empty array, missing no-solution case
-        code_quality: Good structure but missing edge case handling
-        suggestions: Add null checks, handle edge cases, improve error handling
-        error_pattern: edge_case_missing
-        error_category: completeness
-        """)
-        
-        self.attempt_evaluation_chain = (
-            attempt_eval_prompt 
-            | self.llms['attempt_evaluation'] 
-            | self.str_parser
-        )
-        
-        # 2. Hint Generation Chain - Using superior prompt from prompts.py
-        hint_gen_prompt = PromptTemplate.from_template("""
-        Problem Description: {problem_description}
-        
-        User's Current Code:
-        {user_code}
-        
-        User Progress:
-        - Total Attempts: {attempts_count}
-        - Failed Attempts: {failed_attempts_count}
-        - Current Hint Level: {current_hint_level}
-        - Time Since Last Attempt: {time_since_last_attempt} seconds
-        
-        Previous Hints Given:
-        {previous_hints}
-        
-        Current Hint Level: {hint_level}
-        Hint Type: {hint_type}
-        
-        Please generate a hint that:
-        1. Is non-revealing (doesn't give away the solution)
-        2. Is appropriate for hint level {hint_level} and type {hint_type}
-        3. Builds upon previous hints and user's progress
-        4. Guides the user to think about the problem
-        5. Is specific to their current code and approach
-        6. Considers their previous attempts and failures
-        7. Provides pedagogical value by encouraging problem-solving skills
-        
-        The hint should be:
-        - More conceptual for early levels
-        - More specific for higher levels
-        - Focused on the current hint type
-        - Aligned with the user's learning progress
-        
-        Provide only the hint content, no additional formatting.
-        """)
-        
-        self.hint_generation_chain = (
-            hint_gen_prompt 
-            | self.llms['hint_generation'] 
-            | self.str_parser
-        )
-        
-        # 3. Hint Evaluation Chain - Using superior prompt from prompts.py
-        hint_eval_prompt = PromptTemplate.from_template("""
-        Problem Description: {problem_description}
-        
-        User's Code:
-        {user_code}
-        
-        User Progress:
-        - Total Attempts: {attempts_count}
-        - Failed Attempts: {failed_attempts_count}
-        - Current Hint Level: {current_hint_level}
-        - Time Since Last Attempt: {time_since_last_attempt} seconds
-        
-        Previous Hints:
-        {previous_hints}
-        
-        Hint to Evaluate:
-        {hint_content}
-        
-        Please evaluate this hint and provide scores in the following format:
-        
-        safety_score: [score between 0 and 1]
-        helpfulness_score: [score between 0 and 1]
-        quality_score: [score between 0 and 1]
-        progress_alignment_score: [score between 0 and 1]
-        pedagogical_value_score: [score between 0 and 1]
-        
-        For each score, provide a number between 0 and 1, where:
-        - 0 means completely ineffective
-        - 1 means perfect effectiveness
-        
-        Example response format:
-        safety_score: 0.8
-        helpfulness_score: 0.7
-        quality_score: 0.9
-        progress_alignment_score: 0.6
-        pedagogical_value_score: 0.8
-        """)
-        
-        self.hint_evaluation_chain = (
-            hint_eval_prompt 
-            | self.llms['hint_evaluation'] 
-            | self.str_parser
-        )
-        
-        # 4. Auto-Trigger Decision Chain - Using superior prompt from prompts.py
-        auto_trigger_prompt = PromptTemplate.from_template("""
-        Problem Description: {problem_description}
-        
-        User's Current Code:
-        {user_code}
-        
-        User Progress:
-        - Total Attempts: {attempts_count}
-        - Failed Attempts: {failed_attempts_count}
-        - Current Hint Level: {current_hint_level}
-        - Time Since Last Attempt: {time_since_last_attempt} seconds
-        
-        Last Attempt:
-        - Status: {last_attempt_status}
-        - Error Message: {last_attempt_error}
-        - Test Cases Passed: {test_cases_passed}/{total_test_cases}
-        
-        Please analyze if the user needs a hint based on:
-        1. Time since last activity
-        2. Number of failed attempts
-        3. Error patterns in the code
-        4. Test case failures
-        5. Code complexity and approach
-        
-        Provide:
-        1. A decision (yes/no) on whether to trigger a hint
-        2. The reason for the decision
-        3. The recommended hint type (conceptual/approach/implementation/debug)
-        4. The recommended hint level
-        
-        Respond in the following format:
-        decision: [yes/no]
-        reason: [reason for the decision]
-        hint_type: [conceptual/approach/implementation/debug]
-        hint_level: [1-5]
-        """)
-        
-        self.auto_trigger_chain = (
-            auto_trigger_prompt 
-            | self.llms['auto_trigger'] 
-            | self.str_parser
-        )
-        
-        # 5. Main Workflow Chain
-        self._build_main_workflow()
-        
-        logger.info("✅ All chains built successfully")
-
-    def _build_main_workflow(self):
-        """Build the main workflow chain that orchestrates everything"""
-        
-        def run_workflow(inputs):
-            """Run the complete workflow step by step with superior parsing"""
-            logger.info("🔄 Running workflow steps...")
-            
-            # Step 1: Evaluate the attempt
-            attempt_eval_input = {
-                "problem_description": inputs["problem_description"],
-                "user_code": inputs["user_code"]
-            }
-            attempt_eval_response = self.attempt_evaluation_chain.invoke(attempt_eval_input)
-            attempt_evaluation = self._parse_attempt_evaluation(attempt_eval_response)
-            logger.info(f"✅ Step 1 - Attempt evaluation completed: {attempt_evaluation.get('success', 'Unknown')}")
-            
-            # Update hint level and type based on attempt evaluation (after 1st LLM call)
-            logger.info("🎯 Updating hint level and type based on attempt evaluation...")
-            current_hint_level = inputs.get("current_hint_level", 1)
-            attempts_count = inputs.get("attempts_count", 0)
-            failed_attempts_count = inputs.get("failed_attempts_count", 0)
-            time_since_last_attempt = inputs.get("time_since_last_attempt", 0)
-            
-            new_hint_level = self._get_next_hint_level(
-                current_hint_level, failed_attempts_count, time_since_last_attempt, attempt_evaluation
-            )
-            new_hint_type = self._get_hint_type(new_hint_level, attempt_evaluation)
-            
-            logger.info(f"📈 Updated hint level: {current_hint_level} → {new_hint_level}")
-            logger.info(f"🏷️  Updated hint type: {new_hint_type}")
-            
-            # Step 2: Generate hint with updated level and type (using RAG when possible)
-            user_id = inputs.get("user_id")
-            problem_id = inputs.get("problem_id")
-            
-            # Try RAG-enhanced hint generation first
-            if user_id and problem_id:
-                try:
-                    logger.info("🎯 Attempting RAG-enhanced hint generation...")
-                    generated_hint = self.rag_service.generate_rag_enhanced_hint(
-                        problem_description=inputs["problem_description"],
-                        user_code=inputs["user_code"],
-                        previous_hints=inputs.get("previous_hints", []),
-                        hint_level=new_hint_level,
-                        user_progress={
-                            "attempts_count": attempts_count,
-                            "failed_attempts_count": failed_attempts_count,
-                            "current_hint_level": new_hint_level,
-                            "time_since_last_attempt": time_since_last_attempt
-                        },
-                        hint_type=new_hint_type,
-                        user_id=user_id,
-                        problem_id=problem_id
-                    )
-                    logger.info(f"✅ Step 2 - RAG-enhanced hint generated: {len(generated_hint)} characters")
-                except Exception as e:
-                    logger.warning(f"⚠️ RAG hint generation failed, falling back to basic: {e}")
-                    # Fallback to basic hint generation
-                    hint_gen_input = {
-                        "problem_description": inputs["problem_description"],
-                        "user_code": inputs["user_code"],
-                        "attempts_count": attempts_count,
-                        "failed_attempts_count": failed_attempts_count,
-                        "current_hint_level": new_hint_level,
-                        "time_since_last_attempt": time_since_last_attempt,
-                        "previous_hints": inputs.get("previous_hints", []),
-                        "hint_level": new_hint_level,
-                        "hint_type": new_hint_type
-                    }
-                    generated_hint = self.hint_generation_chain.invoke(hint_gen_input)
-                    logger.info(f"✅ Step 2 - Basic hint generated: {len(generated_hint)} characters")
-            else:
-                # Use basic hint generation if user_id or problem_id not available
-                hint_gen_input = {
-                    "problem_description": inputs["problem_description"],
-                    "user_code": inputs["user_code"],
-                    "attempts_count": attempts_count,
-                    "failed_attempts_count": failed_attempts_count,
-                    "current_hint_level": new_hint_level,
-                    "time_since_last_attempt": time_since_last_attempt,
-                    "previous_hints": inputs.get("previous_hints", []),
-                    "hint_level": new_hint_level,
-                    "hint_type": new_hint_type
-                }
-                generated_hint = self.hint_generation_chain.invoke(hint_gen_input)
-                logger.info(f"✅ Step 2 - Basic hint generated: {len(generated_hint)} characters")
-            
-            # Step 3: Evaluate the hint with updated level
-            hint_eval_input = {
-                "problem_description": inputs["problem_description"],
-                "user_code": inputs["user_code"],
-                "attempts_count": attempts_count,
-                "failed_attempts_count": failed_attempts_count,
-                "current_hint_level": new_hint_level,  # Use updated level
-                "time_since_last_attempt": time_since_last_attempt,
-                "previous_hints": inputs.get("previous_hints", []),
-                "hint_content": generated_hint
-            }
-            hint_eval_response = self.hint_evaluation_chain.invoke(hint_eval_input)
-            hint_evaluation = self._parse_hint_evaluation(hint_eval_response)
-            logger.info(f"✅ Step 3 - Hint evaluation completed")
-            
-            return {
-                "attempt_evaluation": attempt_evaluation,
-                "generated_hint": generated_hint,
-                "hint_evaluation": hint_evaluation,
-                "updated_hint_level": new_hint_level,
-                "updated_hint_type": new_hint_type
-            }
-        
-        # Main workflow as a simple chain
-        self.main_workflow = RunnableLambda(run_workflow)
-        
-        logger.info("✅ Main workflow chain built successfully")
-
-    def _get_next_hint_level(self, current_level: int, failed_attempts: int, time_since_last: float, attempt_evaluation: dict) -> int:
-        """
-        Determine the next hint level based on user progress and attempt evaluation.
-        Hint levels:
-        1. Conceptual (Basic understanding)
-        2. Approach (Problem-solving strategy)
-        3. Implementation (Code structure)
-        4. Debug (Specific issues)
-        5. Solution (Almost complete solution)
-        """
-        logger.info("🎯 Determining next hint level...")
-        logger.info(f"   - Current hint level: {current_level}")
-        logger.info(f"   - Failed attempts: {failed_attempts}")
-        logger.info(f"   - Time since last attempt: {time_since_last:.2f} seconds")
-        
-        # If user has made multiple failed attempts, increase hint level
-        if failed_attempts >= 3:
-            new_level = min(current_level + 1, 5)
-            logger.info(f"   - Increasing level due to multiple failures: {current_level} → {new_level}")
-            return new_level
-            
-        # If user is stuck (inactive for 5+ minutes), increase hint level
-        if time_since_last > 300:  # 5 minutes
-            new_level = min(current_level + 1, 5)
-            logger.info(f"   - Increasing level due to user being stuck: {current_level} → {new_level}")
-            return new_level
-            
-        # If attempt evaluation shows specific issues, adjust level accordingly
-        if attempt_evaluation.get('edge_cases'):
-            # If missing edge cases, focus on implementation level
-            new_level = max(3, current_level)
-            logger.info(f"   - Adjusting level for edge case issues: {current_level} → {new_level}")
-            return new_level
-            
-        # If code has complexity issues, focus on approach level
-        if 'complexity' in attempt_evaluation.get('reason', '').lower():
-            new_level = max(2, current_level)
-            logger.info(f"   - Adjusting level for complexity issues: {current_level} → {new_level}")
-            return new_level
-            
-        # If basic logic issues, focus on conceptual level
-        if 'logic' in attempt_evaluation.get('reason', '').lower():
-            new_level = max(1, current_level)
-            logger.info(f"   - Adjusting level for logic issues: {current_level} → {new_level}")
-            return new_level
-            
-        # Default: stay at current level
-        logger.info(f"   - Keeping current level: {current_level}")
-        return current_level
-
-    def _get_hint_type(self, hint_level: int, attempt_evaluation: dict) -> str:
-        """
-        Determine the hint type based on hint level and attempt evaluation.
-        Hint types:
-        - conceptual: Basic understanding (level 1)
-        - approach: Problem-solving strategy (level 2)
-        - implementation: Code structure (level 3)
-        - debug: Specific issues (level 4)
-        """
-        logger.info("🏷️  Determining hint type...")
-        logger.info(f"   - Hint level: {hint_level}")
-        
-        # If there are specific issues in the code, use debug type
-        if attempt_evaluation.get('edge_cases') or 'error' in attempt_evaluation.get('reason', '').lower():
-            hint_type = 'debug'
-            logger.info(f"   - Using debug type due to specific issues")
-            return hint_type
-            
-        # If there are complexity issues, use approach type
-        if 'complexity' in attempt_evaluation.get('reason', '').lower():
-            hint_type = 'approach'
-            logger.info(f"   - Using approach type due to complexity issues")
-            return hint_type
-            
-        # Map hint levels to types
-        hint_type_map = {
-            1: 'conceptual',
-            2: 'approach',
-            3: 'implementation',
-            4: 'debug',
-            5: 'debug'  # Level 5 is also debug as it's for specific issues
-        }
-        
-        hint_type = hint_type_map.get(hint_level, 'conceptual')
-        logger.info(f"   - Mapped hint level {hint_level} to type: {hint_type}")
-        return hint_type
-
-    def _parse_attempt_evaluation(self, response: str) -> Dict[str, Any]:
-        """Parse attempt evaluation response with robust error handling"""
-        result = {
-            'success': False,
-            'reason': '',
-            'complexity': '',
-            'edge_cases': [],
-            'code_quality': '',
-            'suggestions': [],
-            'error_pattern': '',
-            'error_category': ''
-        }
-        
-        try:
-            for line in response.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip().lower()
-                    value = value.strip()
-                    
-                    if key == 'success':
-                        result['success'] = value.lower() == 'true'
-                    elif key == 'reason':
-                        result['reason'] = value
-                    elif key == 'complexity':
-                        result['complexity'] = value
-                    elif key == 'edge_cases':
-                        result['edge_cases'] = [case.strip() for case in value.split(',') if case.strip()]
-                    elif key == 'code_quality':
-                        result['code_quality'] = value
-                    elif key == 'suggestions':
-                        result['suggestions'] = [suggestion.strip() for suggestion in value.split(',') if suggestion.strip()]
-                    elif key == 'error_pattern':
-                        result['error_pattern'] = value
-                    elif key == 'error_category':
-                        result['error_category'] = value
-        except Exception as e:
-            logger.error(f"Error parsing attempt evaluation: {e}")
-        
-        return result
-
-    def _parse_hint_evaluation(self, response: str) -> Dict[str, float]:
-        """Parse hint evaluation response with robust error handling"""
-        scores = {}
-        
-        try:
-            for line in response.split('\n'):
-                line = line.strip()
-                if not line:
-                    continue
-                
-                if ':' in line:
-                    key, value = line.split(':', 1)
-                    key = key.strip().lower()
-                    
-                    # Clean up markdown formatting from key
-                    key = key.replace('**', '').replace('*', '').replace('-', '').strip()
-                    
-                    try:
-                        score = float(value.strip())
-                        if 0 <= score <= 1:  # Ensure score is between 0 and 1
-                            scores[key] = score
-                    except (ValueError, IndexError):
-                        continue
-            
-            # Ensure all required scores are present
-            required_scores = [
-                'safety_score',
-                'helpfulness_score',
-                'quality_score',
-                'progress_alignment_score',
-                'pedagogical_value_score'
-            ]
-            
-            # Set default score of 0.5 for any missing scores
-            for score in required_scores:
-                if score not in scores:
-                    scores[score] = 0.5
-            
-        except Exception as e:
-            logger.error(f"Error parsing hint evaluation: {e}")
-            # Return default scores if parsing fails
-            scores = {
-                'safety_score': 0.5,
-                'helpfulness_score': 0.5,
-                'quality_score': 0.5,
-                'progress_alignment_score': 0.5,
-                'pedagogical_value_score': 0.5
-            }
-        
-        return scores
-
-    def _parse_auto_trigger_decision(self, response: str) -> Tuple[bool, str, str, int]:
-        """Parse auto-trigger decision response with robust error handling"""
-        should_trigger = False
-        reason = ""
-        hint_type = "conceptual"
-        hint_level = 1
-        
-        try:
-            lines = response.split('\n')
-            for line in lines:
-                line = line.strip().lower()
-                if "decision:" in line:
-                    should_trigger = "yes" in line
-                elif "reason:" in line:
-                    reason = line.split("reason:")[1].strip()
-                elif "hint_type:" in line:
-                    hint_type = line.split("hint_type:")[1].strip()
-                elif "hint_level:" in line:
-                    try:
-                        hint_level = int(line.split("hint_level:")[1].strip())
-                    except (ValueError, IndexError):
-                        hint_level = 1
-        except Exception as e:
-            logger.error(f"Error parsing auto-trigger decision: {e}")
-        
-        return should_trigger, reason, hint_type, hint_level
-
-    def process_hint_request(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Process a complete hint request using the LangChain workflow
-        
-        Args:
-            inputs: Dictionary containing all necessary data
-            
-        Returns:
-            Dictionary with attempt_evaluation, generated_hint, and hint_evaluation
-        """
-        logger.info("🔄 Starting hint request processing with LangChain workflow...")
-        
-        try:
-            # Execute the main workflow
-            result = self.main_workflow.invoke(inputs)
-            
-            logger.info("✅ Workflow completed successfully")
-            logger.info(f"   - Attempt evaluation: {result['attempt_evaluation'].get('success', 'Unknown')}")
-            logger.info(f"   - Hint generated: {len(result['generated_hint'])} characters")
-            logger.info(f"   - Hint evaluation scores: {result['hint_evaluation']}")
-            
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Workflow failed: {e}")
-            # Return fallback results
-            return {
-                "attempt_evaluation": {
-                    "success": False,
-                    "reason": "Workflow failed",
-                    "complexity": "Unknown",
-                    "edge_cases": [],
-                    "code_quality": "Unknown",
-                    "suggestions": ["Check your code implementation"]
-                },
-                "generated_hint": "Consider breaking down the problem into smaller steps.",
-                "hint_evaluation": {
-                    "safety_score": 0.8,
-                    "helpfulness_score": 0.7,
-                    "quality_score": 0.8,
-                    "progress_alignment_score": 0.7,
-                    "pedagogical_value_score": 0.8
-                }
-            }
-
-    def check_auto_trigger(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
-        """
-        Check if a hint should be auto-triggered using the auto-trigger chain
-        
-        Args:
-            inputs: Dictionary containing user progress and attempt data
-            
-        Returns:
-            Dictionary with auto-trigger decision
-        """
-        logger.info("🤖 Checking auto-trigger with LangChain...")
-        
-        try:
-            response = self.auto_trigger_chain.invoke(inputs)
-            should_trigger, reason, hint_type, hint_level = self._parse_auto_trigger_decision(response)
-            
-            result = {
-                "should_trigger": should_trigger,
-                "reason": reason,
-                "hint_type": hint_type,
-                "hint_level": hint_level
-            }
-            
-            logger.info(f"✅ Auto-trigger decision: {should_trigger}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Auto-trigger check failed: {e}")
-            return {
-                "should_trigger": False,
-                "reason": "Auto-trigger check failed",
-                "hint_type": "conceptual",
-                "hint_level": 1
-            }
-
-    def evaluate_attempt_only(self, problem_description: str, user_code: str) -> Dict[str, Any]:
-        """
-        Evaluate only the user's attempt (standalone)
-        
-        Args:
-            problem_description: Description of the problem
-            user_code: User's submitted code
-            
-        Returns:
-            Dictionary with attempt evaluation
-        """
-        logger.info("🔍 Evaluating attempt with LangChain...")
-        
-        try:
-            response = self.attempt_evaluation_chain.invoke({
-                "problem_description": problem_description,
-                "user_code": user_code
-            })
-            result = self._parse_attempt_evaluation(response)
-            logger.info(f"✅ Attempt evaluation completed: {result.get('success', 'Unknown')}")
-            return result
-            
-        except Exception as e:
-            logger.error(f"❌ Attempt evaluation failed: {e}")
-            return {
-                "success": False,
-                "reason": "Evaluation failed",
-                "complexity": "Unknown",
-                "edge_cases": [],
-                "code_quality": "Unknown",
-                "suggestions": ["Check your implementation"]
+import os
+import copy
+import logging
+import json
+import re
+import httpx
+import hashlib
+import queue
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, Any, List, Optional, Tuple
+from django.conf import settings
+from django.core.cache import cache
+
+# LangChain imports
+from langchain_core.prompts import PromptTemplate
+from langchain_core.output_parsers import StrOutputParser, JsonOutputParser
+from langchain_openai import ChatOpenAI
+
+# Local imports
+from .rag_service import RAGService
+
+logger = logging.getLogger(__name__)
+
+# Precompiled parsers for the structured LLM responses - a single C-level
+# regex pass instead of per-line Python split loops, tolerant of markdown
+# decoration and ordering
+_REQUIRED_SCORES = (
+    'safety_score',
+    'helpfulness_score',
+    'quality_score',
+    'progress_alignment_score',
+    'pedagogical_value_score'
+)
+# Keys may be markdown-bolded on either side of the colon
+# (e.g. '**safety_score**: 0.8'), hence the \** after the key as well
+_SCORE_RE = re.compile(
+    r'^[\s*#-]*(' + '|'.join(_REQUIRED_SCORES) + r')\**\s*:\s*\**\s*([0-9.]+)',
+    re.MULTILINE | re.IGNORECASE
+)
+_TRIGGER_DECISION_RE = re.compile(r'decision\**\s*:\s*\**\s*(yes|no)', re.IGNORECASE)
+_TRIGGER_REASON_RE = re.compile(r'reason\**\s*:\s*(.+)', re.IGNORECASE)
+_TRIGGER_HINT_TYPE_RE = re.compile(r'hint_type\**\s*:\s*\**\s*(\w+)', re.IGNORECASE)
+_TRIGGER_HINT_LEVEL_RE = re.compile(r'hint_level\**\s*:\s*\**\s*([1-5])', re.IGNORECASE)
+
+def _coerce_str_list(value):
+    """Coerce a JSON list or comma-separated string to a clean str list"""
+    if isinstance(value, list):
+        return [str(item).strip() for item in value if str(item).strip()]
+    return [part.strip() for part in str(value).split(',') if part.strip()]
+
+# Field converters for attempt-evaluation responses - one dict lookup per
+# field instead of an if/elif ladder per line, shared by the JSON and
+# legacy line-format branches
+_ATTEMPT_FIELD_HANDLERS = {
+    'success': lambda v: v if isinstance(v, bool) else str(v).lower() == 'true',
+    'reason': str,
+    'complexity': str,
+    'code_quality': str,
+    'error_pattern': str,
+    'error_category': str,
+    'edge_cases': _coerce_str_list,
+    'suggestions': _coerce_str_list,
+}
+
+# Prompt templates, parsed once at import time instead of per
+# HintChain construction; _build_chains wires them to the LLMs
+# 1. Attempt Evaluation Chain - Enhanced with Error Pattern Classification
+# Prompts keep the static instruction block first and the
+# per-request inputs last, so providers with automatic prefix
+# caching can reuse the prefill of the instruction tokens across
+# every request
+_ATTEMPT_EVAL_PROMPT = PromptTemplate.from_template("""
+        Please analyze if the user's code given below would solve the problem correctly. Consider:
+        1. Logic correctness
+        2. Edge cases
+        3. Time and space complexity
+        4. Code quality
+
+        Respond with a single JSON object in exactly this shape (no extra text):
+        {{
+            "success": true or false,
+            "reason": "brief explanation",
+            "complexity": "time and space complexity",
+            "edge_cases": ["edge cases handled or missed"],
+            "code_quality": "assessment of code quality",
+            "suggestions": ["specific suggestions for improvement"],
+            "error_pattern": "classify the main error pattern - choose from: time_complexity, logic_error, edge_case_missing, wrong_approach, syntax_error, boundary_condition, data_structure_misuse, algorithm_choice, null_pointer, index_error, type_error, or other",
+            "error_category": "categorize the error - choose from: performance, correctness, completeness, or other"
+        }}
+
+        Example response:
+        {{
+            "success": false,
+            "reason": "The code doesn't handle the case where no solution exists",
+            "complexity": "O(n) time, O(1) space",
+            "edge_cases": ["Missing empty array", "missing no-solution case"],
+            "code_quality": "Good structure but missing edge case handling",
+            "suggestions": ["Add null checks", "handle edge cases", "improve error handling"],
+            "error_pattern": "edge_case_missing",
+            "error_category": "completeness"
+        }}
+
+        Problem Description: {problem_description}
+
+        User's Code:
+        {user_code}
+        """)
+
+# 1b. Batch Attempt Evaluation Chain - evaluates several user
+# submissions in one roundtrip for the micro-batcher
+_BATCH_ATTEMPT_EVAL_PROMPT = PromptTemplate.from_template("""
+        You will be given {submission_count} independent problem/code
+        submissions, each tagged with an index.
+
+        {submissions}
+
+        For each submission, analyze if the code would solve its problem
+        correctly. Consider logic correctness, edge cases, time and space
+        complexity, and code quality.
+
+        Respond with a single JSON array containing exactly
+        {submission_count} objects, one per submission in index order (no
+        extra text), each in this shape:
+        {{
+            "success": true or false,
+            "reason": "brief explanation",
+            "complexity": "time and space complexity",
+            "edge_cases": ["edge cases handled or missed"],
+            "code_quality": "assessment of code quality",
+            "suggestions": ["specific suggestions for improvement"],
+            "error_pattern": "main error pattern",
+            "error_category": "performance, correctness, completeness, or other"
+        }}
+        """)
+
+# 2. Hint Generation Chain - Using superior prompt from prompts.py
+# The static instruction block comes first and the per-request
+# sections trail, stable-first (problem, hint history, progress)
+# with the volatile code snapshot last, so provider prefix caching
+# reuses the shared prefill across a user's back-to-back requests
+_HINT_GEN_PROMPT = PromptTemplate.from_template("""
+        Please generate a hint for the problem and user code given below. The hint must:
+        1. Be non-revealing (doesn't give away the solution)
+        2. Be appropriate for the requested hint level and type
+        3. Build upon previous hints and user's progress
+        4. Guide the user to think about the problem
+        5. Be specific to their current code and approach
+        6. Consider their previous attempts and failures
+        7. Provide pedagogical value by encouraging problem-solving skills
+
+        The hint should be:
+        - More conceptual for early levels
+        - More specific for higher levels
+        - Focused on the current hint type
+        - Aligned with the user's learning progress
+
+        Provide only the hint content, no additional formatting.
+
+        Current Hint Level: {hint_level}
+        Hint Type: {hint_type}
+
+        Problem Description: {problem_description}
+
+        Previous Hints Given:
+        {previous_hints}
+
+        User Progress:
+        - Total Attempts: {attempts_count}
+        - Failed Attempts: {failed_attempts_count}
+        - Current Hint Level: {current_hint_level}
+        - Time Since Last Attempt: {time_since_last_attempt} seconds
+
+        User's Current Code:
+        {user_code}
+        """)
+
+# 2b. Combined Generation + Self-Evaluation Chain - one roundtrip
+# instead of separate generate and evaluate calls
+_COMBINED_GEN_EVAL_PROMPT = PromptTemplate.from_template("""
+        Please generate a hint for the problem and user code given below. The hint must:
+        1. Be non-revealing (doesn't give away the solution)
+        2. Be appropriate for hint level {hint_level} and type {hint_type}
+        3. Build upon previous hints and user's progress
+        4. Guide the user to think about the problem
+        5. Be specific to their current code and approach
+        6. Consider their previous attempts and failures
+        7. Provide pedagogical value by encouraging problem-solving skills
+
+        The hint should be:
+        - More conceptual for early levels
+        - More specific for higher levels
+        - Focused on the current hint type
+        - Aligned with the user's learning progress
+
+        After the hint, evaluate it yourself. For each score provide a number
+        between 0 and 1, where 0 means completely ineffective and 1 means
+        perfect effectiveness.
+
+        Respond in exactly this format:
+        ===HINT===
+        [the hint content, no additional formatting]
+        ===SCORES===
+        safety_score: [score between 0 and 1]
+        helpfulness_score: [score between 0 and 1]
+        quality_score: [score between 0 and 1]
+        progress_alignment_score: [score between 0 and 1]
+        pedagogical_value_score: [score between 0 and 1]
+
+        Problem Description: {problem_description}
+
+        Previous Hints Given:
+        {previous_hints}
+
+        User Progress:
+        - Total Attempts: {attempts_count}
+        - Failed Attempts: {failed_attempts_count}
+        - Current Hint Level: {current_hint_level}
+        - Time Since Last Attempt: {time_since_last_attempt} seconds
+
+        User's Current Code:
+        {user_code}
+        """)
+
+# 2c. Full Single-Call Chain - attempt evaluation, hint generation
+# and hint self-evaluation packed into one roundtrip (used by
+# process_hint_request_single_call; skips the RAG retrieval path)
+_FULL_REQUEST_PROMPT = PromptTemplate.from_template("""
+        Perform three tasks in one response for the problem and user code given below:
+        1. Analyze whether the code solves the problem correctly (logic,
+           edge cases, complexity, code quality).
+        2. Generate a non-revealing hint appropriate for hint level
+           {hint_level} and type {hint_type} that builds on the previous
+           hints and the user's progress.
+        3. Evaluate your own hint - each score a number between 0 and 1.
+
+        Respond with a single JSON object in exactly this shape (no extra text):
+        {{
+            "attempt_evaluation": {{
+                "success": true or false,
+                "reason": "brief explanation",
+                "complexity": "time and space complexity",
+                "edge_cases": ["edge cases handled or missed"],
+                "code_quality": "assessment of code quality",
+                "suggestions": ["specific suggestions for improvement"],
+                "error_pattern": "main error pattern",
+                "error_category": "performance, correctness, completeness, or other"
+            }},
+            "hint": "the hint content",
+            "hint_evaluation": {{
+                "safety_score": 0.0,
+                "helpfulness_score": 0.0,
+                "quality_score": 0.0,
+                "progress_alignment_score": 0.0,
+                "pedagogical_value_score": 0.0
+            }}
+        }}
+
+        Current Hint Level: {hint_level}
+        Hint Type: {hint_type}
+
+        Problem Description: {problem_description}
+
+        Previous Hints Given:
+        {previous_hints}
+
+        User Progress:
+        - Total Attempts: {attempts_count}
+        - Failed Attempts: {failed_attempts_count}
+        - Current Hint Level: {current_hint_level}
+        - Time Since Last Attempt: {time_since_last_attempt} seconds
+
+        User's Current Code:
+        {user_code}
+        """)
+
+# 3. Hint Evaluation Chain - Using superior prompt from prompts.py
+_HINT_EVAL_PROMPT = PromptTemplate.from_template("""
+        Please evaluate the hint given below against its problem and the
+        user's code. For each score, provide a number between 0 and 1,
+        where 0 means completely ineffective and 1 means perfect
+        effectiveness.
+
+        Respond with a single JSON object in exactly this shape (no extra text):
+        {{
+            "safety_score": 0.0,
+            "helpfulness_score": 0.0,
+            "quality_score": 0.0,
+            "progress_alignment_score": 0.0,
+            "pedagogical_value_score": 0.0
+        }}
+
+        Example response:
+        {{
+            "safety_score": 0.8,
+            "helpfulness_score": 0.7,
+            "quality_score": 0.9,
+            "progress_alignment_score": 0.6,
+            "pedagogical_value_score": 0.8
+        }}
+
+        Problem Description: {problem_description}
+
+        Previous Hints:
+        {previous_hints}
+
+        User Progress:
+        - Total Attempts: {attempts_count}
+        - Failed Attempts: {failed_attempts_count}
+        - Current Hint Level: {current_hint_level}
+        - Time Since Last Attempt: {time_since_last_attempt} seconds
+
+        User's Code:
+        {user_code}
+
+        Hint to Evaluate:
+        {hint_content}
+        """)
+
+# 3b. Batch Hint Evaluation Chain - scores K candidate hints in a
+# single roundtrip instead of K separate evaluation calls
+_BATCH_HINT_EVAL_PROMPT = PromptTemplate.from_template("""
+        Problem Description: {problem_description}
+
+        User's Code:
+        {user_code}
+
+        Candidate Hints:
+        {numbered_hints}
+
+        Please evaluate each candidate hint. For each score, provide a
+        number between 0 and 1, where 0 means completely ineffective and 1
+        means perfect effectiveness.
+
+        Respond with a single JSON array containing exactly {hint_count}
+        objects, one per candidate in the order given (no extra text):
+        [
+            {{
+                "safety_score": 0.0,
+                "helpfulness_score": 0.0,
+                "quality_score": 0.0,
+                "progress_alignment_score": 0.0,
+                "pedagogical_value_score": 0.0
+            }}
+        ]
+        """)
+
+# 3c. Cross-Request Hint Evaluation Chain - scores hints from
+# several independent requests (different problems/users) in one
+# indexed roundtrip for the micro-batcher
+_CROSS_HINT_EVAL_PROMPT = PromptTemplate.from_template("""
+        You will be given {entry_count} independent hint evaluations, each
+        tagged with an index and carrying its own problem, user code and
+        hint.
+
+        {entries}
+
+        For each entry, evaluate the hint against its own problem and
+        code. For each score, provide a number between 0 and 1, where 0
+        means completely ineffective and 1 means perfect effectiveness.
+
+        Respond with a single JSON array containing exactly {entry_count}
+        objects, one per entry in index order (no extra text), each in
+        this shape:
+        {{
+            "safety_score": 0.0,
+            "helpfulness_score": 0.0,
+            "quality_score": 0.0,
+            "progress_alignment_score": 0.0,
+            "pedagogical_value_score": 0.0
+        }}
+        """)
+
+# 4. Auto-Trigger Decision Chain - Using superior prompt from prompts.py
+_AUTO_TRIGGER_PROMPT = PromptTemplate.from_template("""
+        Please analyze if the user described below needs a hint based on:
+        1. Time since last activity
+        2. Number of failed attempts
+        3. Error patterns in the code
+        4. Test case failures
+        5. Code complexity and approach
+
+        Provide:
+        1. A decision (yes/no) on whether to trigger a hint
+        2. The reason for the decision
+        3. The recommended hint type (conceptual/approach/implementation/debug)
+        4. The recommended hint level
+
+        Respond with a single JSON object in exactly this shape (no extra text):
+        {{
+            "decision": "yes or no",
+            "reason": "reason for the decision",
+            "hint_type": "conceptual/approach/implementation/debug",
+            "hint_level": 1
+        }}
+
+        Problem Description: {problem_description}
+
+        User Progress:
+        - Total Attempts: {attempts_count}
+        - Failed Attempts: {failed_attempts_count}
+        - Current Hint Level: {current_hint_level}
+        - Time Since Last Attempt: {time_since_last_attempt} seconds
+
+        Last Attempt:
+        - Status: {last_attempt_status}
+        - Error Message: {last_attempt_error}
+        - Test Cases Passed: {test_cases_passed}/{total_test_cases}
+
+        User's Current Code:
+        {user_code}
+        """)
+
+# Single-pass classification of an attempt evaluation - each flag costs
+# one substring scan, computed once and shared by the hint level and
+# hint type decisions instead of each re-lowering and re-scanning the
+# reason text
+def _evaluation_flags(attempt_evaluation: Dict[str, Any]) -> Tuple[bool, bool, bool, bool]:
+    reason = attempt_evaluation.get('reason', '').lower()
+    return (
+        bool(attempt_evaluation.get('edge_cases')),  # edge cases missed
+        'complexity' in reason,                      # complexity issues
+        'logic' in reason,                           # logic issues
+        'error' in reason,                           # specific errors
+    )
+
+# Evaluation-driven level floors, in priority order, applied when the
+# failure/inactivity escalations don't: (flag index, floor level, label)
+_LEVEL_RULES = (
+    (0, 3, 'edge case issues'),
+    (1, 2, 'complexity issues'),
+    (2, 1, 'logic issues'),
+)
+
+# Neutral result served when the workflow fails outright - built once
+# instead of re-allocating the nested literal on every failure path
+_FALLBACK_RESULT = {
+    "attempt_evaluation": {
+        "success": False,
+        "reason": "Workflow failed",
+        "complexity": "Unknown",
+        "edge_cases": [],
+        "code_quality": "Unknown",
+        "suggestions": ["Check your code implementation"]
+    },
+    "generated_hint": "Consider breaking down the problem into smaller steps.",
+    "hint_evaluation": {
+        "safety_score": 0.8,
+        "helpfulness_score": 0.7,
+        "quality_score": 0.8,
+        "progress_alignment_score": 0.7,
+        "pedagogical_value_score": 0.8
+    }
+}
+
+# Delivered in place of a generated hint when the attempt already solves
+# the problem - the workflow short-circuits past generation + evaluation
+_SUCCESS_HINT = (
+    "Great work - your solution looks correct! As a next step, review its "
+    "time and space complexity and whether any edge cases could be handled "
+    "more cleanly."
+)
+
+# Hint level -> type mapping (level 5 is also debug - specific issues)
+_HINT_TYPE_MAP = {
+    1: 'conceptual',
+    2: 'approach',
+    3: 'implementation',
+    4: 'debug',
+    5: 'debug'
+}
+
+def _extract_json(response: str) -> Optional[Dict[str, Any]]:
+    """Extract a JSON object from an LLM response, tolerating code fences"""
+    text = response.strip()
+    start = text.find('{')
+    end = text.rfind('}')
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return data if isinstance(data, dict) else None
+
+def _extract_json_array(response: str) -> Optional[List[Any]]:
+    """Extract a JSON array from an LLM response, tolerating code fences"""
+    text = response.strip()
+    start = text.find('[')
+    end = text.rfind(']')
+    if start == -1 or end <= start:
+        return None
+    try:
+        data = json.loads(text[start:end + 1])
+    except (json.JSONDecodeError, ValueError):
+        return None
+    return data if isinstance(data, list) else None
+
+class _MicroBatcher:
+    """
+    Micro-batcher that coalesces near-simultaneous LLM calls of one kind
+    into a single indexed call.
+
+    Callers block on a Future while a worker thread drains the queue after
+    a short debounce window and sends everything pending as one indexed
+    prompt, splitting the JSON-array response back to each caller. Useful
+    in classroom bursts where many submissions land within milliseconds.
+    """
+
+    WINDOW_SECONDS = 0.05
+    MAX_BATCH = 8
+
+    def __init__(self, single_fn, batch_fn, name):
+        self.single_fn = single_fn
+        self.batch_fn = batch_fn
+        self.queue = queue.Queue()
+        self.worker = threading.Thread(
+            target=self._run, name=f'{name}-batcher', daemon=True
+        )
+        self.worker.start()
+
+    def evaluate(self, eval_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Enqueue one evaluation and block until its result is available"""
+        future = Future()
+        self.queue.put((eval_input, future))
+        return future.result()
+
+    def _run(self):
+        while True:
+            batch = [self.queue.get()]
+            deadline = time.monotonic() + self.WINDOW_SECONDS
+            while len(batch) < self.MAX_BATCH:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self.queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._process(batch)
+
+    def _process(self, batch):
+        try:
+            if len(batch) == 1:
+                results = [self.single_fn(batch[0][0])]
+            else:
+                results = self.batch_fn([inputs for inputs, _ in batch])
+            for (_, future), result in zip(batch, results):
+                future.set_result(result)
+        except BaseException as e:
+            for _, future in batch:
+                if not future.done():
+                    future.set_exception(e)
+
+class HintChain:
+    # How long cached LLM responses stay valid (seconds)
+    LLM_CACHE_TIMEOUT = 86400
+
+    def __init__(self):
+        logger.info("🚀 Initializing HintChain...")
+
+        self.api_key = settings.OPENROUTER_API_KEY
+        self.langsmith_api_key = settings.LANGSMITH_API_KEY
+
+        # Configure LangSmith
+        if self.langsmith_api_key:
+            os.environ["LANGCHAIN_API_KEY"] = self.langsmith_api_key
+            os.environ["LANGCHAIN_PROJECT"] = settings.LANGSMITH_PROJECT
+            os.environ["LANGCHAIN_TRACING_V2"] = str(settings.LANGSMITH_TRACING_V2)
+            os.environ["LANGCHAIN_ENDPOINT"] = settings.LANGSMITH_ENDPOINT
+
+        # Model configurations for different operations; models come from
+        # settings so the narrow scoring/decision calls can be routed to a
+        # cheaper, faster model than generation without a code change
+        self.model_configs = {
+            'attempt_evaluation': {
+                'model': settings.ATTEMPT_EVALUATION_MODEL,
+                # Deterministic: the same (problem, code) pair always maps
+                # to the same verdict, so cached replays are exact rather
+                # than one sampled outcome among several
+                'temperature': 0.0,
+                # Provider-enforced JSON mode - the model cannot emit the
+                # malformed free text that forces fallback parsing/defaults
+                'response_format': {'type': 'json_object'},
+                # Output caps: generation latency is linear in emitted
+                # tokens, and each response has a known bounded shape.
+                # Caps are sized with headroom for reasoning-model
+                # thinking tokens, which count against the limit
+                'max_tokens': 1024,
+                'description': 'Attempt Evaluation Model'
+            },
+            'hint_generation': {
+                'model': settings.DEFAULT_MODEL,
+                'temperature': 0.7,  # Higher temperature for creative hint generation
+                'max_tokens': 1536,
+                # Token-streaming transport so the SSE endpoint receives
+                # chunks as they're generated rather than one final body
+                'streaming': True,
+                'description': 'Hint Generation Model'
+            },
+            'hint_evaluation': {
+                'model': settings.FAST_MODEL,
+                'temperature': 0.2,  # Very low temperature for consistent scoring
+                'max_tokens': 768,
+                'description': 'Hint Evaluation Model'
+            },
+            'auto_trigger': {
+                'model': settings.FAST_MODEL,
+                'temperature': 0.4,  # Medium temperature for balanced decision making
+                'response_format': {'type': 'json_object'},
+                'max_tokens': 768,
+                'description': 'Auto-Trigger Decision Model'
+            }
+        }
+
+        # Shared HTTP client so all LLM calls reuse pooled keep-alive
+        # connections instead of paying a TCP+TLS handshake per call. The
+        # pool is sized well above the executor width so concurrent
+        # workflows (speculation, spares, deferred evaluations) never queue
+        # on a connection slot, and idle keep-alives are held for a minute
+        # to ride out gaps between a user's consecutive requests
+        self.http_client = httpx.Client(
+            limits=httpx.Limits(
+                max_connections=64,
+                max_keepalive_connections=32,
+                keepalive_expiry=60.0
+            ),
+            timeout=httpx.Timeout(60.0, connect=5.0)
+        )
+
+        # Initialize LLM instances for each operation
+        self.llms = {}
+        for operation, config in self.model_configs.items():
+            model_kwargs = {}
+            if 'response_format' in config:
+                model_kwargs['response_format'] = config['response_format']
+            self.llms[operation] = ChatOpenAI(
+                model=config['model'],
+                openai_api_key=self.api_key,
+                openai_api_base="https://openrouter.ai/api/v1",
+                temperature=config['temperature'],
+                max_tokens=config['max_tokens'],
+                streaming=config.get('streaming', False),
+                model_kwargs=model_kwargs,
+                http_client=self.http_client
+            )
+            logger.info("✅ Initialized %s: %s (temp: %s)", config['description'], config['model'], config['temperature'])
+
+        # Initialize output parsers
+        self.str_parser = StrOutputParser()
+        self.json_parser = JsonOutputParser()
+
+        # Initialize RAG service (shares the pooled HTTP client)
+        self.rag_service = RAGService(http_client=self.http_client)
+
+        # Executor for leaf tasks - single LLM calls that can overlap with
+        # other work (e.g. hint evaluation running concurrently with DB
+        # writes, speculative generation, deferred scoring)
+        self.executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hint-chain')
+
+        # Separate executor for whole-pipeline runs (async hint jobs,
+        # batched workflows). These must not share the leaf-task pool: a
+        # workflow submits nested tasks to self.executor and blocks on
+        # their futures, so running workflows there lets four in-flight
+        # runs occupy every worker while their own nested tasks sit queued
+        # behind them - a permanent deadlock
+        self.workflow_executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix='hint-workflow')
+
+        # Hit/miss counters for the LLM response cache
+        self.cache_stats = {'hits': 0, 'misses': 0}
+
+        # Single-flight map: concurrent identical calls share one in-flight
+        # computation instead of each issuing their own. Keys are
+        # namespaced - 'llm:' for individual chain calls, 'wf:' for whole
+        # workflow runs
+        self._inflight = {}
+        self._inflight_lock = threading.Lock()
+
+        # Per-upstream-model concurrency caps - see _invoke_chain
+        per_model = getattr(settings, 'PER_MODEL_CONCURRENCY', 8)
+        self._model_semaphores = defaultdict(lambda: threading.Semaphore(per_model))
+
+        # Build the chains
+        self._build_chains()
+
+        # Optional micro-batchers coalescing concurrent evaluations into
+        # one indexed LLM call each (classroom burst traffic)
+        self.attempt_eval_batcher = None
+        if getattr(settings, 'BATCH_ATTEMPT_EVALUATION', False):
+            self.attempt_eval_batcher = _MicroBatcher(
+                self._evaluate_attempt_single, self._evaluate_attempts_batch,
+                'attempt-eval'
+            )
+            logger.info("✅ Attempt evaluation micro-batcher enabled")
+        self.hint_eval_batcher = None
+        if getattr(settings, 'BATCH_HINT_EVALUATION', False):
+            self.hint_eval_batcher = _MicroBatcher(
+                self._evaluate_generated_hint_single, self._evaluate_hints_cross_batch,
+                'hint-eval'
+            )
+            logger.info("✅ Hint evaluation micro-batcher enabled")
+
+        logger.info("✅ HintChain initialized successfully")
+
+    def _build_chains(self):
+        """Build all the LangChain components with superior prompts and parsing"""
+
+        
+        self.attempt_evaluation_chain = (
+            _ATTEMPT_EVAL_PROMPT
+            | self.llms['attempt_evaluation']
+            | self.str_parser
+        )
+
+        # Batch responses carry up to MAX_BATCH entries, so the per-call
+        # output cap is lifted accordingly via bind
+        self.batch_attempt_evaluation_chain = (
+            _BATCH_ATTEMPT_EVAL_PROMPT
+            | self.llms['attempt_evaluation'].bind(max_tokens=4096)
+            | self.str_parser
+        )
+
+        self.hint_generation_chain = (
+            _HINT_GEN_PROMPT
+            | self.llms['hint_generation']
+            | self.str_parser
+        )
+
+        self.hint_generation_and_evaluation_chain = (
+            _COMBINED_GEN_EVAL_PROMPT
+            | self.llms['hint_generation']
+            | self.str_parser
+        )
+
+        # Pre-partialed variants per (hint_level, hint_type): both slots
+        # come from tiny fixed vocabularies, so binding them at startup
+        # skips their per-request template substitution and keeps each
+        # combination's rendered prefix stable for provider-side caching
+        self.hint_generation_and_evaluation_chains = {
+            (level, hint_type): (
+                _COMBINED_GEN_EVAL_PROMPT.partial(hint_level=level, hint_type=hint_type)
+                | self.llms['hint_generation']
+                | self.str_parser
+            )
+            for level in range(1, 6)
+            for hint_type in ('conceptual', 'approach', 'implementation', 'debug')
+        }
+
+        # Three tasks in one response - needs more room than a plain hint
+        self.full_request_chain = (
+            _FULL_REQUEST_PROMPT
+            | self.llms['hint_generation'].bind(max_tokens=2048)
+            | self.str_parser
+        )
+
+        
+        self.hint_evaluation_chain = (
+            _HINT_EVAL_PROMPT
+            | self.llms['hint_evaluation']
+            | self.str_parser
+        )
+
+        self.batch_hint_evaluation_chain = (
+            _BATCH_HINT_EVAL_PROMPT
+            | self.llms['hint_evaluation'].bind(max_tokens=2048)
+            | self.str_parser
+        )
+
+        self.cross_hint_evaluation_chain = (
+            _CROSS_HINT_EVAL_PROMPT
+            | self.llms['hint_evaluation'].bind(max_tokens=2048)
+            | self.str_parser
+        )
+
+        self.auto_trigger_chain = (
+            _AUTO_TRIGGER_PROMPT 
+            | self.llms['auto_trigger'] 
+            | self.str_parser
+        )
+
+        logger.info("✅ All chains built successfully")
+
+    def submit_attempt_evaluation(self, problem_description: str, user_code: str) -> Future:
+        """
+        Run evaluate_attempt_only on the executor and return its Future.
+
+        Lets callers kick off the attempt-evaluation LLM roundtrip early and
+        overlap it with their own work (typically the progress/previous-hint
+        DB queries); pass the Future into the workflow inputs as
+        'attempt_evaluation_future' to avoid evaluating twice.
+        """
+        return self.executor.submit(self.evaluate_attempt_only, problem_description, user_code)
+
+    def _run_workflow(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Run the workflow, coalescing concurrent identical requests.
+
+        Burst traffic (double-submits, multiple tabs, classroom mirrors)
+        can land N identical requests while the first is still in flight;
+        the singleflight map hands all of them the first run's result for
+        the price of one set of LLM calls. The key covers the fields that
+        shape the output - problem, code snapshot, level and hint history.
+        """
+        try:
+            payload = json.dumps([
+                inputs.get("problem_description"),
+                inputs.get("user_code"),
+                inputs.get("current_hint_level"),
+                inputs.get("previous_hints"),
+            ], default=str)
+        except TypeError:
+            return self._run_workflow_steps(inputs)
+        key = 'wf:' + hashlib.blake2b(payload.encode(), digest_size=16).hexdigest()
+
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                is_owner = True
+            else:
+                is_owner = False
+
+        if not is_owner:
+            logger.info("✅ Coalesced duplicate in-flight workflow run")
+            return future.result()
+
+        try:
+            result = self._run_workflow_steps(inputs)
+            future.set_result(result)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return result
+
+    def _run_workflow_steps(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """Run the complete workflow step by step with superior parsing"""
+        logger.info("🔄 Running workflow steps...")
+
+        current_hint_level = inputs.get("current_hint_level", 1)
+        attempts_count = inputs.get("attempts_count", 0)
+        failed_attempts_count = inputs.get("failed_attempts_count", 0)
+        time_since_last_attempt = inputs.get("time_since_last_attempt", 0)
+
+        # Speculative generation: while the attempt evaluation is in
+        # flight, optimistically generate a hint at the current level
+        # and its default type on the executor. When the post-evaluation
+        # level and type land where they started (the common case), the
+        # two LLM roundtrips overlap instead of running back to back; a
+        # level change discards the speculation and pays the normal
+        # generation call it would have paid anyway
+        speculative_future = None
+        speculative_key = None
+        if (
+            getattr(settings, 'SPECULATIVE_HINT_GENERATION', False)
+            and inputs.get("attempt_evaluation") is None
+        ):
+            speculative_key = (
+                current_hint_level,
+                _HINT_TYPE_MAP.get(current_hint_level, 'conceptual')
+            )
+            speculative_future = self.executor.submit(
+                self._generate_hint_with_inline_scores, {
+                    "problem_description": inputs["problem_description"],
+                    "user_code": inputs["user_code"],
+                    "attempts_count": attempts_count,
+                    "failed_attempts_count": failed_attempts_count,
+                    "current_hint_level": current_hint_level,
+                    "time_since_last_attempt": time_since_last_attempt,
+                    "previous_hints": inputs.get("previous_hints", []),
+                    "hint_level": speculative_key[0],
+                    "hint_type": speculative_key[1]
+                }
+            )
+            logger.info("🔮 Speculative hint generation started at level %s (%s)", speculative_key[0], speculative_key[1])
+
+        # Step 1: Evaluate the attempt (or reuse an evaluation the
+        # caller already has / started via submit_attempt_evaluation)
+        eval_future = inputs.get("attempt_evaluation_future")
+        if inputs.get("attempt_evaluation") is not None:
+            attempt_evaluation = inputs["attempt_evaluation"]
+        elif eval_future is not None:
+            attempt_evaluation = eval_future.result()
+        else:
+            attempt_eval_input = {
+                "problem_description": inputs["problem_description"],
+                "user_code": inputs["user_code"]
+            }
+            attempt_evaluation = self._evaluate_attempt(attempt_eval_input)
+        logger.info("✅ Step 1 - Attempt evaluation completed: %s", attempt_evaluation.get('success', 'Unknown'))
+
+        # Terminal case: the attempt already solves the problem, so
+        # generating and scoring a guidance hint would be two wasted LLM
+        # calls. Ship the static acknowledgement with perfect scores and
+        # keep the hint level where it is
+        if attempt_evaluation.get('success'):
+            if speculative_future is not None:
+                speculative_future.cancel()
+            logger.info("🎉 Attempt already successful - skipping hint generation and evaluation")
+            return {
+                "attempt_evaluation": attempt_evaluation,
+                "generated_hint": _SUCCESS_HINT,
+                "hint_evaluation": {score: 1.0 for score in _REQUIRED_SCORES},
+                "updated_hint_level": current_hint_level,
+                "updated_hint_type": _HINT_TYPE_MAP.get(current_hint_level, 'conceptual')
+            }
+
+        # Update hint level and type based on attempt evaluation (after 1st
+        # LLM call); the reason text is scanned once and the flags shared
+        # by both decisions
+        logger.info("🎯 Updating hint level and type based on attempt evaluation...")
+
+        eval_flags = _evaluation_flags(attempt_evaluation)
+        new_hint_level = self._get_next_hint_level(
+            current_hint_level, failed_attempts_count, time_since_last_attempt,
+            attempt_evaluation, flags=eval_flags
+        )
+        new_hint_type = self._get_hint_type(new_hint_level, attempt_evaluation, flags=eval_flags)
+
+        logger.info("📈 Updated hint level: %s → %s", current_hint_level, new_hint_level)
+        logger.info("🏷️  Updated hint type: %s", new_hint_type)
+
+        # Step 2: Generate hint with updated level and type (using RAG when possible)
+        user_id = inputs.get("user_id")
+        problem_id = inputs.get("problem_id")
+
+        # Scores produced inline by the combined generation+evaluation
+        # call; stays None on the RAG path or if the model ignores the format
+        inline_scores = None
+
+        # Shared input for the combined generation + self-evaluation call
+        # (fallback path and spare candidates)
+        hint_gen_input = {
+            "problem_description": inputs["problem_description"],
+            "user_code": inputs["user_code"],
+            "attempts_count": attempts_count,
+            "failed_attempts_count": failed_attempts_count,
+            "current_hint_level": new_hint_level,
+            "time_since_last_attempt": time_since_last_attempt,
+            "previous_hints": inputs.get("previous_hints", []),
+            "hint_level": new_hint_level,
+            "hint_type": new_hint_type
+        }
+
+        # When the caller anticipates a duplicate (previous hints exist),
+        # sample spare candidates concurrently with the primary call so
+        # a collision doesn't cost a second sequential LLM roundtrip
+        spare_futures = [
+            self.executor.submit(self._generate_hint_with_inline_scores, hint_gen_input)
+            for _ in range(inputs.get("hint_candidates", 1) - 1)
+        ]
+
+        generated_hint = None
+
+        # Cash in the speculation when the decision landed on the
+        # speculated level/type; a miss means the level moved, so the
+        # optimistic hint is wrong-leveled and gets discarded
+        if speculative_future is not None:
+            if (new_hint_level, new_hint_type) == speculative_key:
+                try:
+                    generated_hint, inline_scores = speculative_future.result()
+                    logger.info("✅ Step 2 - Speculative hint hit, generation overlapped with evaluation")
+                except Exception as e:
+                    logger.warning("⚠️ Speculative hint generation failed: %s", e)
+                    generated_hint, inline_scores = None, None
+            else:
+                speculative_future.cancel()
+                logger.info("🔮 Speculation missed (level/type moved to %s/%s), regenerating", new_hint_level, new_hint_type)
+
+        # Try RAG-enhanced hint generation first
+        if generated_hint is not None:
+            pass
+        elif user_id and problem_id:
+            try:
+                logger.info("🎯 Attempting RAG-enhanced hint generation...")
+                generated_hint = self.rag_service.generate_rag_enhanced_hint(
+                    problem_description=inputs["problem_description"],
+                    user_code=inputs["user_code"],
+                    previous_hints=inputs.get("previous_hints", []),
+                    hint_level=new_hint_level,
+                    user_progress={
+                        "attempts_count": attempts_count,
+                        "failed_attempts_count": failed_attempts_count,
+                        "current_hint_level": new_hint_level,
+                        "time_since_last_attempt": time_since_last_attempt
+                    },
+                    hint_type=new_hint_type,
+                    user_id=user_id,
+                    problem_id=problem_id
+                )
+                logger.info("✅ Step 2 - RAG-enhanced hint generated: %s characters", len(generated_hint))
+            except Exception as e:
+                logger.warning("⚠️ RAG hint generation failed, falling back to basic: %s", e)
+                # Fallback to combined generation + self-evaluation
+                generated_hint, inline_scores = self._generate_hint_with_inline_scores(hint_gen_input)
+        else:
+            # Use combined generation + self-evaluation if user_id or problem_id not available
+            generated_hint, inline_scores = self._generate_hint_with_inline_scores(hint_gen_input)
+
+        # Step 3: Evaluate the hint with updated level
+        hint_eval_input = {
+            "problem_description": inputs["problem_description"],
+            "user_code": inputs["user_code"],
+            "attempts_count": attempts_count,
+            "failed_attempts_count": failed_attempts_count,
+            "current_hint_level": new_hint_level,  # Use updated level
+            "time_since_last_attempt": time_since_last_attempt,
+            "previous_hints": inputs.get("previous_hints", []),
+            "hint_content": generated_hint
+        }
+
+        result = {
+            "attempt_evaluation": attempt_evaluation,
+            "generated_hint": generated_hint,
+            "updated_hint_level": new_hint_level,
+            "updated_hint_type": new_hint_type
+        }
+
+        if spare_futures:
+            candidates = []
+            for future in spare_futures:
+                try:
+                    spare_hint, spare_scores = future.result()
+                    candidates.append({"hint": spare_hint, "scores": spare_scores})
+                except Exception as e:
+                    logger.warning("⚠️ Spare hint candidate failed: %s", e)
+            result["hint_candidates"] = candidates
+            logger.info("✅ Sampled %s spare hint candidate(s) in parallel", len(candidates))
+
+        if inline_scores is not None:
+            # Combined call already produced the scores - no separate
+            # evaluation roundtrip needed
+            result["hint_evaluation"] = inline_scores
+            logger.info("✅ Step 3 - Hint evaluation taken from combined response")
+        elif inputs.get("defer_hint_evaluation"):
+            # Run the evaluation call on the executor so the caller can
+            # overlap it with its own work (typically the DB writes)
+            result["hint_evaluation_future"] = self.executor.submit(
+                self._evaluate_generated_hint, hint_eval_input
+            )
+            logger.info("✅ Step 3 - Hint evaluation dispatched in background")
+        else:
+            result["hint_evaluation"] = self._evaluate_generated_hint(hint_eval_input)
+            logger.info("✅ Step 3 - Hint evaluation completed")
+
+        return result
+
+    def _invoke_chain(self, operation: str, chain, chain_input: Dict[str, Any]) -> str:
+        """
+        Invoke a chain while holding the upstream model's concurrency slot.
+
+        OpenRouter rate-limits per model; without a local ceiling a burst
+        of concurrent workflows stampedes into 429s and the client's
+        exponential backoff serializes everything anyway, just slower.
+        Capping in-process concurrency per model keeps throughput at the
+        limit instead of thrashing against it.
+        """
+        with self._model_semaphores[self.model_configs[operation]['model']]:
+            return chain.invoke(chain_input)
+
+    def _invoke_with_cache(self, operation: str, chain, chain_input: Dict[str, Any]) -> str:
+        """
+        Invoke a chain through an exact-match response cache keyed on
+        (model, input). Identical prompts (same problem, same code snapshot,
+        same history) skip the OpenRouter roundtrip entirely. Only used for
+        the low-temperature evaluation operations where responses are
+        effectively deterministic; high-temperature operations and
+        deployments with ENABLE_PROMPT_CACHE off call straight through.
+        """
+        config = self.model_configs[operation]
+        if (
+            not getattr(settings, 'ENABLE_PROMPT_CACHE', True)
+            or config['temperature'] > 0.5
+        ):
+            return self._invoke_chain(operation, chain, chain_input)
+
+        model = config['model']
+        try:
+            payload = json.dumps(chain_input, sort_keys=True, default=str)
+        except TypeError:
+            # Unhashable input - just call through
+            return self._invoke_chain(operation, chain, chain_input)
+
+        # blake2b matches the code/content hashing used across the app and
+        # is faster than sha256 in CPython for these kilobyte-sized payloads
+        key = 'llm:' + hashlib.blake2b(f"{model}\x00{payload}".encode(), digest_size=16).hexdigest()
+        cached = cache.get(key)
+        if cached is not None:
+            self.cache_stats['hits'] += 1
+            logger.info("✅ LLM response cache hit for %s", operation)
+            return cached
+
+        # Single-flight: if another thread is already computing this exact
+        # key, wait on its future instead of issuing a duplicate LLM call
+        with self._inflight_lock:
+            future = self._inflight.get(key)
+            if future is None:
+                future = Future()
+                self._inflight[key] = future
+                is_owner = True
+            else:
+                is_owner = False
+
+        if not is_owner:
+            logger.info("✅ Coalesced duplicate in-flight %s call", operation)
+            return future.result()
+
+        self.cache_stats['misses'] += 1
+        try:
+            response = self._invoke_chain(operation, chain, chain_input)
+            cache.set(key, response, timeout=self.LLM_CACHE_TIMEOUT)
+            future.set_result(response)
+        except BaseException as e:
+            future.set_exception(e)
+            raise
+        finally:
+            with self._inflight_lock:
+                self._inflight.pop(key, None)
+        return response
+
+    def _generate_hint_with_inline_scores(self, hint_gen_input: Dict[str, Any]) -> Tuple[str, Optional[Dict[str, float]]]:
+        """
+        Generate a hint and its evaluation scores in a single LLM call.
+
+        Returns (hint_content, scores) where scores is None if the model
+        ignored the delimited format - callers then fall back to the
+        separate evaluation chain.
+        """
+        # Dispatch to the chain pre-partialed for this (level, type) pair;
+        # unexpected combinations fall back to the generic chain
+        chain = self.hint_generation_and_evaluation_chains.get(
+            (hint_gen_input.get("hint_level"), hint_gen_input.get("hint_type")),
+            self.hint_generation_and_evaluation_chain
+        )
+        response = self._invoke_chain('hint_generation', chain, hint_gen_input)
+
+        if '===SCORES===' in response:
+            hint_part, scores_part = response.split('===SCORES===', 1)
+            hint_content = hint_part.replace('===HINT===', '').strip()
+            if hint_content and any(key in scores_part for key in (
+                'safety_score', 'helpfulness_score', 'quality_score',
+                'progress_alignment_score', 'pedagogical_value_score'
+            )):
+                logger.info("✅ Step 2 - Combined hint + evaluation generated: %s characters", len(hint_content))
+                return hint_content, self._parse_hint_evaluation(scores_part)
+
+        # Model ignored the format - treat the whole response as the hint
+        logger.warning("⚠️  Combined response missing SCORES block, falling back to separate evaluation")
+        hint_content = response.replace('===HINT===', '').strip()
+        return hint_content, None
+
+    def stream_hint_generation(self, hint_gen_input: Dict[str, Any]):
+        """
+        Yield hint content chunks as the LLM produces them.
+
+        Uses the plain generation chain (no inline self-evaluation block)
+        so every streamed token is hint content the client can render
+        immediately; callers persist the joined hint once the stream ends.
+        """
+        logger.info("🌊 Streaming hint generation...")
+        # Streams hold their model's concurrency slot for their full
+        # duration - they occupy an upstream connection just like a
+        # blocking call does
+        with self._model_semaphores[self.model_configs['hint_generation']['model']]:
+            for chunk in self.hint_generation_chain.stream(hint_gen_input):
+                if chunk:
+                    yield chunk
+
+    def _evaluate_attempt(self, attempt_eval_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Evaluate one attempt, through the micro-batcher when enabled"""
+        if self.attempt_eval_batcher is not None:
+            return self.attempt_eval_batcher.evaluate(attempt_eval_input)
+        return self._evaluate_attempt_single(attempt_eval_input)
+
+    def _evaluate_attempt_single(self, attempt_eval_input: Dict[str, Any]) -> Dict[str, Any]:
+        """Run one attempt evaluation through the cache and parse it"""
+        response = self._invoke_with_cache(
+            'attempt_evaluation', self.attempt_evaluation_chain, attempt_eval_input
+        )
+        return self._parse_attempt_evaluation(response)
+
+    def _evaluate_attempts_batch(self, attempt_eval_inputs: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Evaluate several submissions in one indexed LLM call.
+
+        Entries the model failed to cover fall back to individual
+        evaluation so callers always get a full result list.
+        """
+        submissions = "\n\n".join(
+            f"[{i}] Problem Description:\n{inp['problem_description']}\n\n[{i}] User's Code:\n{inp['user_code']}"
+            for i, inp in enumerate(attempt_eval_inputs, 1)
+        )
+        response = self._invoke_chain('attempt_evaluation', self.batch_attempt_evaluation_chain, {
+            "submission_count": len(attempt_eval_inputs),
+            "submissions": submissions
+        })
+        items = _extract_json_array(response) or []
+
+        results = []
+        for i, attempt_eval_input in enumerate(attempt_eval_inputs):
+            if i < len(items) and isinstance(items[i], dict):
+                results.append(self._parse_attempt_evaluation(json.dumps(items[i])))
+            else:
+                logger.warning("⚠️  Batch response missing entry %s, evaluating individually", i + 1)
+                results.append(self._evaluate_attempt_single(attempt_eval_input))
+        logger.info("✅ Micro-batched %s attempt evaluations into one call", len(attempt_eval_inputs))
+        return results
+
+    def submit_hint_evaluation(self, hint_eval_input: Dict[str, Any]) -> Future:
+        """Run the hint evaluation chain on the executor and return its Future"""
+        return self.executor.submit(self._evaluate_generated_hint, hint_eval_input)
+
+    def _evaluate_generated_hint(self, hint_eval_input: Dict[str, Any]) -> Dict[str, float]:
+        """Evaluate one hint, through the micro-batcher when enabled"""
+        if self.hint_eval_batcher is not None:
+            return self.hint_eval_batcher.evaluate(hint_eval_input)
+        return self._evaluate_generated_hint_single(hint_eval_input)
+
+    def _evaluate_generated_hint_single(self, hint_eval_input: Dict[str, Any]) -> Dict[str, float]:
+        """Run one hint evaluation through the cache and parse the scores"""
+        hint_eval_response = self._invoke_with_cache(
+            'hint_evaluation', self.hint_evaluation_chain, hint_eval_input
+        )
+        return self._parse_hint_evaluation(hint_eval_response)
+
+    def _evaluate_hints_cross_batch(self, hint_eval_inputs: List[Dict[str, Any]]) -> List[Dict[str, float]]:
+        """
+        Evaluate hints from several independent requests in one indexed
+        LLM call.
+
+        Entries the model failed to cover fall back to individual
+        evaluation so callers always get a full result list.
+        """
+        entries = "\n\n".join(
+            f"[{i}] Problem Description:\n{inp['problem_description']}\n\n"
+            f"[{i}] User's Code:\n{inp['user_code']}\n\n"
+            f"[{i}] Hint to Evaluate:\n{inp['hint_content']}"
+            for i, inp in enumerate(hint_eval_inputs, 1)
+        )
+        response = self._invoke_chain('hint_evaluation', self.cross_hint_evaluation_chain, {
+            "entry_count": len(hint_eval_inputs),
+            "entries": entries
+        })
+        items = _extract_json_array(response) or []
+
+        results = []
+        for i, hint_eval_input in enumerate(hint_eval_inputs):
+            if i < len(items) and isinstance(items[i], dict):
+                results.append(self._parse_hint_evaluation(json.dumps(items[i])))
+            else:
+                logger.warning("⚠️  Batch response missing entry %s, evaluating individually", i + 1)
+                results.append(self._evaluate_generated_hint_single(hint_eval_input))
+        logger.info("✅ Micro-batched %s hint evaluations into one call", len(hint_eval_inputs))
+        return results
+
+    def evaluate_hints_batch(self, hints: List[str], problem_description: str, user_code: str) -> List[Dict[str, float]]:
+        """
+        Score multiple candidate hints in a single LLM call.
+
+        Packs all candidates into one evaluation prompt requesting a JSON
+        array of score objects, so K candidates cost one roundtrip instead
+        of K. Returns one score dict per hint in input order; candidates the
+        model failed to score fall back to neutral 0.5 defaults.
+        """
+        if not hints:
+            return []
+
+        numbered_hints = "\n\n".join(
+            f"Hint {i}:\n{hint}" for i, hint in enumerate(hints, 1)
+        )
+        try:
+            response = self._invoke_with_cache('hint_evaluation', self.batch_hint_evaluation_chain, {
+                "problem_description": problem_description,
+                "user_code": user_code,
+                "numbered_hints": numbered_hints,
+                "hint_count": len(hints)
+            })
+        except Exception as e:
+            logger.error("❌ Batch hint evaluation failed: %s", e)
+            response = ''
+
+        items = _extract_json_array(response) or []
+        scores = []
+        for i in range(len(hints)):
+            item = items[i] if i < len(items) and isinstance(items[i], dict) else {}
+            parsed = {}
+            for key in _REQUIRED_SCORES:
+                try:
+                    value = float(item.get(key))
+                except (TypeError, ValueError):
+                    value = 0.5
+                parsed[key] = value if 0 <= value <= 1 else 0.5
+            scores.append(parsed)
+
+        logger.info("✅ Batch-evaluated %s candidate hints in one call", len(hints))
+        return scores
+
+    def _get_next_hint_level(self, current_level: int, failed_attempts: int, time_since_last: float, attempt_evaluation: dict, flags: Optional[Tuple[bool, ...]] = None) -> int:
+        """
+        Determine the next hint level based on user progress and attempt evaluation.
+        Hint levels:
+        1. Conceptual (Basic understanding)
+        2. Approach (Problem-solving strategy)
+        3. Implementation (Code structure)
+        4. Debug (Specific issues)
+        5. Solution (Almost complete solution)
+        """
+        logger.info("🎯 Determining next hint level...")
+        logger.info("   - Current hint level: %s", current_level)
+        logger.info("   - Failed attempts: %s", failed_attempts)
+        logger.info("   - Time since last attempt: %.2f seconds", time_since_last)
+
+        if flags is None:
+            flags = _evaluation_flags(attempt_evaluation)
+
+        # If user has made multiple failed attempts, increase hint level
+        if failed_attempts >= 3:
+            new_level = min(current_level + 1, 5)
+            logger.info("   - Increasing level due to multiple failures: %s → %s", current_level, new_level)
+            return new_level
+
+        # If user is stuck (inactive for 5+ minutes), increase hint level
+        if time_since_last > 300:  # 5 minutes
+            new_level = min(current_level + 1, 5)
+            logger.info("   - Increasing level due to user being stuck: %s → %s", current_level, new_level)
+            return new_level
+
+        # Otherwise apply the evaluation-driven floors in priority order
+        # (edge cases -> implementation, complexity -> approach,
+        # logic -> conceptual)
+        for flag_index, floor, label in _LEVEL_RULES:
+            if flags[flag_index]:
+                new_level = max(floor, current_level)
+                logger.info("   - Adjusting level for %s: %s → %s", label, current_level, new_level)
+                return new_level
+
+        # Default: stay at current level
+        logger.info("   - Keeping current level: %s", current_level)
+        return current_level
+
+    def _get_hint_type(self, hint_level: int, attempt_evaluation: dict, flags: Optional[Tuple[bool, ...]] = None) -> str:
+        """
+        Determine the hint type based on hint level and attempt evaluation.
+        Hint types:
+        - conceptual: Basic understanding (level 1)
+        - approach: Problem-solving strategy (level 2)
+        - implementation: Code structure (level 3)
+        - debug: Specific issues (level 4)
+        """
+        logger.info("🏷️  Determining hint type...")
+        logger.info("   - Hint level: %s", hint_level)
+
+        if flags is None:
+            flags = _evaluation_flags(attempt_evaluation)
+        has_edge_cases, has_complexity, _, has_error = flags
+
+        # If there are specific issues in the code, use debug type
+        if has_edge_cases or has_error:
+            hint_type = 'debug'
+            logger.info("   - Using debug type due to specific issues")
+            return hint_type
+
+        # If there are complexity issues, use approach type
+        if has_complexity:
+            hint_type = 'approach'
+            logger.info("   - Using approach type due to complexity issues")
+            return hint_type
+
+        hint_type = _HINT_TYPE_MAP.get(hint_level, 'conceptual')
+        logger.info("   - Mapped hint level %s to type: %s", hint_level, hint_type)
+        return hint_type
+
+    def _parse_attempt_evaluation(self, response: str) -> Dict[str, Any]:
+        """Parse attempt evaluation response with robust error handling"""
+        result = {
+            'success': False,
+            'reason': '',
+            'complexity': '',
+            'edge_cases': [],
+            'code_quality': '',
+            'suggestions': [],
+            'error_pattern': '',
+            'error_category': ''
+        }
+
+        # JSON-mode response is the expected shape
+        data = _extract_json(response)
+        if data is not None:
+            for key in result:
+                if key in data:
+                    result[key] = _ATTEMPT_FIELD_HANDLERS[key](data[key])
+            return result
+
+        # Fallback: legacy key: value line format
+        try:
+            for line in response.split('\n'):
+                line = line.strip()
+                if not line or ':' not in line:
+                    continue
+                key, value = line.split(':', 1)
+                key = key.strip().lower()
+                handler = _ATTEMPT_FIELD_HANDLERS.get(key)
+                if handler is not None:
+                    result[key] = handler(value.strip())
+        except Exception as e:
+            logger.error("Error parsing attempt evaluation: %s", e)
+
+        return result
+
+    def _parse_hint_evaluation(self, response: str) -> Dict[str, float]:
+        """Parse hint evaluation response with robust error handling"""
+        scores = {}
+
+        # JSON-mode response is the expected shape; fall back to the
+        # line-format regex for models that ignore the format directive
+        data = _extract_json(response)
+        if data is not None:
+            pairs = [(str(k).lower(), v) for k, v in data.items()]
+        else:
+            pairs = _SCORE_RE.findall(response)
+
+        try:
+            for key, value in pairs:
+                key = key.lower()
+                if key not in _REQUIRED_SCORES:
+                    continue
+                try:
+                    score = float(value)
+                except (TypeError, ValueError):
+                    continue
+                if 0 <= score <= 1:  # Ensure score is between 0 and 1
+                    scores[key] = score
+        except Exception as e:
+            logger.error("Error parsing hint evaluation: %s", e)
+
+        # Set default score of 0.5 for any missing scores
+        for score in _REQUIRED_SCORES:
+            scores.setdefault(score, 0.5)
+
+        return scores
+
+    def _parse_auto_trigger_decision(self, response: str) -> Tuple[bool, str, str, int]:
+        """Parse auto-trigger decision response with robust error handling"""
+        should_trigger = False
+        reason = ""
+        hint_type = "conceptual"
+        hint_level = 1
+
+        # JSON-mode response is the expected shape
+        data = _extract_json(response)
+        if data is not None:
+            decision = data.get('decision', False)
+            should_trigger = decision if isinstance(decision, bool) else str(decision).lower() == 'yes'
+            reason = str(data.get('reason', '')).strip().lower()
+            hint_type = str(data.get('hint_type', 'conceptual')).strip().lower() or 'conceptual'
+            try:
+                hint_level = int(data.get('hint_level', 1))
+            except (TypeError, ValueError):
+                hint_level = 1
+            return should_trigger, reason, hint_type, hint_level
+
+        # Fallback: legacy key: value line format
+        try:
+            decision_match = _TRIGGER_DECISION_RE.search(response)
+            if decision_match:
+                should_trigger = decision_match.group(1).lower() == "yes"
+            reason_match = _TRIGGER_REASON_RE.search(response)
+            if reason_match:
+                reason = reason_match.group(1).strip().lower()
+            type_match = _TRIGGER_HINT_TYPE_RE.search(response)
+            if type_match:
+                hint_type = type_match.group(1).lower()
+            level_match = _TRIGGER_HINT_LEVEL_RE.search(response)
+            if level_match:
+                hint_level = int(level_match.group(1))
+        except Exception as e:
+            logger.error("Error parsing auto-trigger decision: %s", e)
+
+        return should_trigger, reason, hint_type, hint_level
+
+    def process_hint_request(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a complete hint request using the LangChain workflow
+
+        Args:
+            inputs: Dictionary containing all necessary data
+
+        Returns:
+            Dictionary with attempt_evaluation, generated_hint, and hint_evaluation
+        """
+        logger.info("🔄 Starting hint request processing with LangChain workflow...")
+
+        try:
+            # Execute the workflow as a direct method call - wrapping it
+            # in a Runnable added callback/tracing dispatch per request
+            # without buying anything for a plain pass-through
+            result = self._run_workflow(inputs)
+
+            logger.info("✅ Workflow completed successfully")
+            logger.info("   - Attempt evaluation: %s", result['attempt_evaluation'].get('success', 'Unknown'))
+            logger.info("   - Hint generated: %s characters", len(result['generated_hint']))
+            if 'hint_evaluation' in result:
+                logger.info("   - Hint evaluation scores: %s", result['hint_evaluation'])
+
+            return result
+
+        except Exception as e:
+            logger.error("❌ Workflow failed: %s", e)
+            # Deep copy so callers can mutate their result without
+            # poisoning the shared template
+            return copy.deepcopy(_FALLBACK_RESULT)
+
+    def process_hint_request_batch(self, inputs_list: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Process several hint requests concurrently and return the results
+        in submission order.
+
+        The workflows run on the workflow executor, so N requests overlap
+        their LLM roundtrips over the pooled HTTP connection instead of
+        running back to back; with BATCH_ATTEMPT_EVALUATION enabled their
+        attempt evaluations additionally coalesce into one indexed call
+        via the micro-batcher. Each entry fails independently - a broken
+        request yields its fallback result without affecting the others.
+        """
+        if not inputs_list:
+            return []
+        if len(inputs_list) == 1:
+            return [self.process_hint_request(inputs_list[0])]
+
+        logger.info("🔄 Processing %s hint requests as one batch...", len(inputs_list))
+        futures = [self.workflow_executor.submit(self.process_hint_request, inputs) for inputs in inputs_list]
+        return [future.result() for future in futures]
+
+    def process_hint_request_single_call(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Process a hint request with one LLM roundtrip instead of three.
+
+        Sends a single multi-task prompt returning attempt evaluation, hint
+        and self-evaluation as one JSON object. Trades the RAG retrieval
+        path for a ~3x cut in roundtrips and token cost; falls back to the
+        stepwise workflow if the model ignores the schema.
+        """
+        logger.info("🔄 Processing hint request with single-call workflow...")
+        try:
+            response = self._invoke_chain('hint_generation', self.full_request_chain, {
+                "problem_description": inputs["problem_description"],
+                "user_code": inputs["user_code"],
+                "attempts_count": inputs.get("attempts_count", 0),
+                "failed_attempts_count": inputs.get("failed_attempts_count", 0),
+                "current_hint_level": inputs.get("current_hint_level", 1),
+                "time_since_last_attempt": inputs.get("time_since_last_attempt", 0),
+                "previous_hints": inputs.get("previous_hints", []),
+                "hint_level": inputs.get("hint_level", 1),
+                "hint_type": inputs.get("hint_type", "conceptual")
+            })
+            data = _extract_json(response)
+        except Exception as e:
+            logger.error("❌ Single-call workflow failed: %s", e)
+            data = None
+
+        if (
+            data is None
+            or not str(data.get('hint', '')).strip()
+            or not isinstance(data.get('attempt_evaluation'), dict)
+        ):
+            logger.warning("⚠️  Single-call response unusable, falling back to stepwise workflow")
+            return self.process_hint_request(inputs)
+
+        attempt_evaluation = self._parse_attempt_evaluation(json.dumps(data['attempt_evaluation']))
+        hint_evaluation = self._parse_hint_evaluation(json.dumps(data.get('hint_evaluation', {})))
+        eval_flags = _evaluation_flags(attempt_evaluation)
+        new_hint_level = self._get_next_hint_level(
+            inputs.get("current_hint_level", 1),
+            inputs.get("failed_attempts_count", 0),
+            inputs.get("time_since_last_attempt", 0),
+            attempt_evaluation,
+            flags=eval_flags
+        )
+        new_hint_type = self._get_hint_type(new_hint_level, attempt_evaluation, flags=eval_flags)
+
+        logger.info("✅ Single-call workflow completed (1 roundtrip)")
+        return {
+            "attempt_evaluation": attempt_evaluation,
+            "generated_hint": str(data['hint']).strip(),
+            "hint_evaluation": hint_evaluation,
+            "updated_hint_level": new_hint_level,
+            "updated_hint_type": new_hint_type
+        }
+
+    def check_auto_trigger(self, inputs: Dict[str, Any]) -> Dict[str, Any]:
+        """
+        Check if a hint should be auto-triggered using the auto-trigger chain
+
+        Args:
+            inputs: Dictionary containing user progress and attempt data
+
+        Returns:
+            Dictionary with auto-trigger decision
+        """
+        logger.info("🤖 Checking auto-trigger with LangChain...")
+
+        try:
+            response = self._invoke_with_cache('auto_trigger', self.auto_trigger_chain, inputs)
+            should_trigger, reason, hint_type, hint_level = self._parse_auto_trigger_decision(response)
+
+            result = {
+                "should_trigger": should_trigger,
+                "reason": reason,
+                "hint_type": hint_type,
+                "hint_level": hint_level
+            }
+
+            logger.info("✅ Auto-trigger decision: %s", should_trigger)
+            return result
+
+        except Exception as e:
+            logger.error("❌ Auto-trigger check failed: %s", e)
+            return {
+                "should_trigger": False,
+                "reason": "Auto-trigger check failed",
+                "hint_type": "conceptual",
+                "hint_level": 1
+            }
+
+    def evaluate_attempt_only(self, problem_description: str, user_code: str) -> Dict[str, Any]:
+        """
+        Evaluate only the user's attempt (standalone)
+
+        Args:
+            problem_description: Description of the problem
+            user_code: User's submitted code
+
+        Returns:
+            Dictionary with attempt evaluation
+        """
+        logger.info("🔍 Evaluating attempt with LangChain...")
+
+        try:
+            result = self._evaluate_attempt({
+                "problem_description": problem_description,
+                "user_code": user_code
+            })
+            logger.info("✅ Attempt evaluation completed: %s", result.get('success', 'Unknown'))
+            return result
+
+        except Exception as e:
+            logger.error("❌ Attempt evaluation failed: %s", e)
+            return {
+                "success": False,
+                "reason": "Evaluation failed",
+                "complexity": "Unknown",
+                "edge_cases": [],
+                "code_quality": "Unknown",
+                "suggestions": ["Check your implementation"]
             } 
\ No newline at end of file
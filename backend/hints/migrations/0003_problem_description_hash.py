@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:26
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0002_problem_problem_id'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='problem',
+            name='description_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+    ]
@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:38
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0003_problem_description_hash'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hintdelivery',
+            index=models.Index(fields=['user_id', 'hint', '-created_at'], name='hd_user_hint_created_idx'),
+        ),
+    ]
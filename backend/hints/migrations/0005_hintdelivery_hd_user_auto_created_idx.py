@@ -0,0 +1,17 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0004_hintdelivery_hd_user_hint_created_idx'),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name='hintdelivery',
+            index=models.Index(fields=['user_id', 'is_auto_triggered', 'created_at'], name='hd_user_auto_created_idx'),
+        ),
+    ]
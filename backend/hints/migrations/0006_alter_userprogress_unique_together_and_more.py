@@ -0,0 +1,25 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:48
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0005_hintdelivery_hd_user_auto_created_idx'),
+    ]
+
+    operations = [
+        migrations.AlterUniqueTogether(
+            name='userprogress',
+            unique_together={('user_id', 'problem')},
+        ),
+        migrations.AddIndex(
+            model_name='attempt',
+            index=models.Index(fields=['user_id', 'problem', '-created_at'], name='attempt_user_problem_idx'),
+        ),
+        migrations.AddIndex(
+            model_name='hintdelivery',
+            index=models.Index(fields=['user_id', '-created_at'], name='hd_user_created_idx'),
+        ),
+    ]
@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:49
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0006_alter_userprogress_unique_together_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userprogress',
+            name='last_code_hash',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
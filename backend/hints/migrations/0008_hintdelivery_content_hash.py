@@ -0,0 +1,18 @@
+# Generated by Django 5.2.17 on 2026-08-31 03:56
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0007_userprogress_last_code_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='hintdelivery',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=32),
+        ),
+    ]
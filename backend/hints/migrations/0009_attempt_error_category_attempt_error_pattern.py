@@ -0,0 +1,23 @@
+# Generated by Django 5.2.17 on 2026-08-31 04:07
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0008_hintdelivery_content_hash'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='attempt',
+            name='error_category',
+            field=models.CharField(blank=True, default='', max_length=100),
+        ),
+        migrations.AddField(
+            model_name='attempt',
+            name='error_pattern',
+            field=models.CharField(blank=True, default='', max_length=200),
+        ),
+    ]
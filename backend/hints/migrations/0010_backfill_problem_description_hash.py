@@ -0,0 +1,34 @@
+import hashlib
+
+from django.db import migrations
+
+
+def backfill_description_hash(apps, schema_editor):
+    """
+    Populate description_hash for rows created before the column existed.
+
+    The column was added with default='' and is only set by Problem.save(),
+    so without this backfill pre-existing rows are invisible to the indexed
+    description lookup. Mirrors Problem.hash_description (historical models
+    don't carry model methods).
+    """
+    Problem = apps.get_model('hints', 'Problem')
+    batch = []
+    for problem in Problem.objects.filter(description_hash='').iterator():
+        problem.description_hash = hashlib.blake2b(
+            (problem.description or '').encode(), digest_size=32
+        ).hexdigest()
+        batch.append(problem)
+    if batch:
+        Problem.objects.bulk_update(batch, ['description_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0009_attempt_error_category_attempt_error_pattern'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_description_hash, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+import hashlib
+
+from django.db import migrations
+
+
+def backfill_content_hash(apps, schema_editor):
+    """
+    Populate content_hash for deliveries created before the column existed.
+
+    The column was added with default='' and is only set on new deliveries,
+    so without this backfill _is_duplicate_hint cannot see any hint
+    delivered before the upgrade and would re-deliver it. Mirrors
+    views._hint_content_hash (historical models don't carry helpers).
+    """
+    HintDelivery = apps.get_model('hints', 'HintDelivery')
+    batch = []
+    deliveries = HintDelivery.objects.filter(content_hash='').select_related('hint')
+    for delivery in deliveries.iterator():
+        delivery.content_hash = hashlib.blake2b(
+            (delivery.hint.content or '').strip().encode(), digest_size=16
+        ).hexdigest()
+        batch.append(delivery)
+    if batch:
+        HintDelivery.objects.bulk_update(batch, ['content_hash'], batch_size=500)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('hints', '0010_backfill_problem_description_hash'),
+    ]
+
+    operations = [
+        migrations.RunPython(backfill_content_hash, migrations.RunPython.noop),
+    ]
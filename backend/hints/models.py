@@ -2,6 +2,12 @@ from django.db import models
 from django.contrib.auth.models import User
 from django.utils import timezone
 from datetime import timedelta
+import hashlib
+
+# Stuck detection: inactivity window and minimum failed attempts. Module
+# constants so is_stuck doesn't rebuild the timedelta on every call
+STUCK_THRESHOLD = timedelta(minutes=5)
+STUCK_FAILED_ATTEMPTS = 3
 
 class Problem(models.Model):
     DIFFICULTY_CHOICES = [
@@ -9,15 +15,25 @@ class Problem(models.Model):
         ('medium', 'Medium'),
         ('hard', 'Hard')
     ]
-    
+
     id = models.AutoField(primary_key=True)
     title = models.CharField(max_length=200)
     problem_id = models.IntegerField(unique=True, null=True, blank=True)  # User-provided problem ID
     description = models.TextField()
+    description_hash = models.CharField(max_length=64, db_index=True, blank=True, default='')  # Indexed lookup key for description-based matching
     difficulty = models.CharField(max_length=10, choices=DIFFICULTY_CHOICES, default='medium')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    @staticmethod
+    def hash_description(description):
+        """Compute the deterministic hash used for indexed description lookups"""
+        return hashlib.blake2b(description.encode(), digest_size=32).hexdigest()
+
+    def save(self, *args, **kwargs):
+        self.description_hash = self.hash_description(self.description or '')
+        super().save(*args, **kwargs)
+
     def __str__(self):
         return f"{self.id}: {self.title}"
 
@@ -28,13 +44,30 @@ class UserProgress(models.Model):
     attempts_count = models.IntegerField(default=0)
     failed_attempts_count = models.IntegerField(default=0)
     current_hint_level = models.IntegerField(default=1)
+    last_code_hash = models.CharField(max_length=32, blank=True, default='')  # blake2b-16 of the last submitted code
+
+    class Meta:
+        # One progress row per user+problem; the unique index also serves
+        # the per-request get_or_create lookup
+        unique_together = ('user_id', 'problem')
+
+    @classmethod
+    def get_with_problem(cls, user_id, problem_id):
+        """
+        Fetch a user's progress row joined with its problem in one query,
+        looked up by the user-facing problem_id. Returns None when the
+        user has no progress for that problem yet.
+        """
+        return cls.objects.select_related('problem').filter(
+            user_id=user_id, problem__problem_id=problem_id
+        ).first()
 
     def is_stuck(self):
         """Check if user is stuck based on inactivity and failed attempts"""
-        time_threshold = timedelta(minutes=5)
+        # Counter check first - it short-circuits without touching the clock
         return (
-            timezone.now() - self.last_activity > time_threshold and
-            self.failed_attempts_count >= 3
+            self.failed_attempts_count >= STUCK_FAILED_ATTEMPTS and
+            timezone.now() - self.last_activity > STUCK_THRESHOLD
         )
 
     def __str__(self):
@@ -46,9 +79,19 @@ class Attempt(models.Model):
     code = models.TextField()
     status = models.CharField(max_length=20, default='pending')
     evaluation_details = models.JSONField(null=True, blank=True)  # Added field for storing evaluation details
+    # Common evaluation scalars promoted to typed columns so error-pattern
+    # analysis can read them without unpacking the JSON blob per row
+    error_pattern = models.CharField(max_length=200, blank=True, default='')
+    error_category = models.CharField(max_length=100, blank=True, default='')
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Covers the per-user attempt history lookup, newest first
+            models.Index(fields=['user_id', 'problem', '-created_at'], name='attempt_user_problem_idx'),
+        ]
+
     def __str__(self):
         return f"Attempt by user {self.user_id} on {self.problem.title}"
 
@@ -75,9 +118,22 @@ class HintDelivery(models.Model):
     user_id = models.IntegerField(default=0)  # Added default value
     attempt = models.ForeignKey(Attempt, on_delete=models.CASCADE, related_name='hint_deliveries')
     is_auto_triggered = models.BooleanField(default=False)
+    content_hash = models.CharField(max_length=32, db_index=True, blank=True, default='')  # blake2b-16 of the delivered hint text
     created_at = models.DateTimeField(auto_now_add=True)
     updated_at = models.DateTimeField(auto_now=True)
 
+    class Meta:
+        indexes = [
+            # Covers the previous-hints lookup (filter on user + hint join,
+            # ordered newest first) as an index range scan
+            models.Index(fields=['user_id', 'hint', '-created_at'], name='hd_user_hint_created_idx'),
+            # Covers the auto-trigger debounce lookup (recent auto-triggered
+            # deliveries for a user)
+            models.Index(fields=['user_id', 'is_auto_triggered', 'created_at'], name='hd_user_auto_created_idx'),
+            # Per-user delivery feed ordered newest first
+            models.Index(fields=['user_id', '-created_at'], name='hd_user_created_idx'),
+        ]
+
     def __str__(self):
         return f"Hint delivery to user {self.user_id}"
 
@@ -22,15 +22,29 @@ from .models import Problem, Attempt, Hint, UserProgress
 
 logger = logging.getLogger(__name__)
 
+# Compiled once at import time - _generate_basic_hint previously rebuilt
+# this template (and reparsed it) on every fallback call
+_BASIC_HINT_PROMPT = PromptTemplate.from_template("""
+Problem Description: {problem_description}
+
+User's Current Code:
+{user_code}
+
+Current Hint Level: {hint_level}
+Hint Type: {hint_type}
+
+Generate a helpful hint that guides the user without giving away the solution.
+""")
+
 class RAGService:
     """
     Retrieval-Augmented Generation service for enhanced hint generation.
     Uses similar problems and user history to provide more contextual hints.
     """
     
-    def __init__(self):
+    def __init__(self, http_client=None):
         logger.info("🚀 Initializing RAG Service...")
-        
+
         self.api_key = settings.OPENROUTER_API_KEY
         
         # Configure LangSmith for tracing (same as hint_chain.py)
@@ -44,18 +58,24 @@ class RAGService:
             logger.warning("⚠️ LangSmith API key not found, RAG tracing disabled")
         
         # Initialize LLM for RAG-enhanced hint generation
+        # Reuse the caller's pooled HTTP client when provided so hint
+        # generation shares keep-alive connections with the other chains
         self.rag_llm = ChatOpenAI(
             model='deepseek/deepseek-r1-0528-qwen3-8b:free',
             openai_api_key=self.api_key,
             openai_api_base="https://openrouter.ai/api/v1",
-            temperature=0.7
+            temperature=0.7,
+            http_client=http_client
         )
         
         # Initialize TF-IDF vectorizer for similarity search
+        # float32 halves the memory footprint of the embedding cache and the
+        # cosine-similarity matmuls without affecting retrieval quality
         self.vectorizer = TfidfVectorizer(
             max_features=1000,
             stop_words='english',
-            ngram_range=(1, 2)
+            ngram_range=(1, 2),
+            dtype=np.float32
         )
         
         # Cache for problem embeddings
@@ -173,6 +193,9 @@ class RAGService:
             | self.rag_llm
             | StrOutputParser()
         )
+
+        # Fallback chain built once rather than per _generate_basic_hint call
+        self.basic_hint_chain = _BASIC_HINT_PROMPT | self.rag_llm | StrOutputParser()
     
     def _preprocess_text(self, text: str) -> str:
         """Preprocess text for similarity search"""
@@ -211,16 +234,18 @@ class RAGService:
         """Find similar problems based on content and user history"""
         logger.info(f"🔍 Finding similar problems for problem {current_problem.id} from user {user_id}'s history")
         
-        # Get problems that this user has attempted before (excluding current problem)
-        user_attempted_problems = Problem.objects.filter(
+        # Get problems that this user has attempted before (excluding current
+        # problem) - materialized once so the exists/count checks and the
+        # similarity loop below share a single query
+        user_attempted_problems = list(Problem.objects.filter(
             attempts__user_id=user_id
-        ).exclude(id=current_problem.id).distinct()
-        
-        if not user_attempted_problems.exists():
+        ).exclude(id=current_problem.id).distinct())
+
+        if not user_attempted_problems:
             logger.info(f"⚠️  User {user_id} has no previous problem attempts")
             return []
-        
-        logger.info(f"📊 User {user_id} has attempted {user_attempted_problems.count()} different problems")
+
+        logger.info(f"📊 User {user_id} has attempted {len(user_attempted_problems)} different problems")
         
         # Get current problem embedding
         current_embedding = self._get_problem_embedding(current_problem)
@@ -257,15 +282,15 @@ class RAGService:
         user_solutions = {}
         
         for problem in similar_problems:
-            # Get successful attempts by this user for this problem
-            successful_attempts = Attempt.objects.filter(
+            # Latest successful attempt in one query (exists() + first()
+            # would issue two)
+            latest_attempt = Attempt.objects.filter(
                 user_id=user_id,
                 problem=problem,
                 status='success'
-            ).order_by('-created_at')
-            
-            if successful_attempts.exists():
-                latest_attempt = successful_attempts.first()
+            ).order_by('-created_at').first()
+
+            if latest_attempt is not None:
                 user_solutions[problem.title] = latest_attempt.code
         
         logger.info(f"✅ Found {len(user_solutions)} previous solutions")
@@ -279,25 +304,30 @@ class RAGService:
         
         for problem in similar_problems:
             # Get failed attempts for this problem by the same user
-            failed_attempts = Attempt.objects.filter(
+            failed_attempts = list(Attempt.objects.filter(
                 problem=problem,
                 user_id=user_id,
                 status='failed'
-            )[:10]  # Increased limit for more comprehensive analysis
-            
-            logger.debug(f"   - Found {failed_attempts.count()} failed attempts for {problem.title}")
+            )[:10])  # Increased limit for more comprehensive analysis
+
+            logger.debug(f"   - Found {len(failed_attempts)} failed attempts for {problem.title}")
             
             for attempt in failed_attempts:
-                if attempt.evaluation_details:
+                if attempt.evaluation_details or attempt.error_pattern or attempt.error_category:
                     try:
-                        eval_data = attempt.evaluation_details
+                        # Typed columns first; the JSON blob only needs
+                        # unpacking for the reason and for legacy rows
+                        # written before the columns existed
+                        error_pattern = attempt.error_pattern
+                        error_category = attempt.error_category
+                        eval_data = attempt.evaluation_details or {}
                         if isinstance(eval_data, str):
                             eval_data = json.loads(eval_data)
-                        
+
                         reason = eval_data.get('reason', '')
-                        error_pattern = eval_data.get('error_pattern', '')
-                        error_category = eval_data.get('error_category', '')
-                        
+                        error_pattern = error_pattern or eval_data.get('error_pattern', '')
+                        error_category = error_category or eval_data.get('error_category', '')
+
                         # Combine all error information for richer context
                         error_info = []
                         if reason:
@@ -369,8 +399,9 @@ class RAGService:
             if problem_id:
                 current_problem = Problem.objects.get(id=problem_id)
             else:
+                # Indexed hash lookup instead of a full-table icontains scan
                 current_problem = Problem.objects.filter(
-                    description__icontains=problem_description[:100]
+                    description_hash=Problem.hash_description(problem_description)
                 ).first()
             if not current_problem:
                 logger.warning("Could not identify current problem, falling back to basic hint generation")
@@ -407,22 +438,8 @@ class RAGService:
     ) -> str:
         """Fallback basic hint generation without RAG"""
         logger.info("🔄 Falling back to basic hint generation")
-        
-        basic_prompt = PromptTemplate.from_template("""
-        Problem Description: {problem_description}
-        
-        User's Current Code:
-        {user_code}
-        
-        Current Hint Level: {hint_level}
-        Hint Type: {hint_type}
-        
-        Generate a helpful hint that guides the user without giving away the solution.
-        """)
-        
-        basic_chain = basic_prompt | self.rag_llm | StrOutputParser()
-        
-        return basic_chain.invoke({
+
+        return self.basic_hint_chain.invoke({
             "problem_description": problem_description,
             "user_code": user_code,
             "hint_level": hint_level,
@@ -433,16 +450,19 @@ class RAGService:
         """Analyze user's learning patterns for personalization"""
         logger.info(f"📊 Analyzing learning patterns for user {user_id}")
         
-        # Get user's attempt history
-        attempts = Attempt.objects.filter(user_id=user_id).order_by('created_at')
-        
-        if not attempts.exists():
+        # Get user's attempt history in one query - the loop below iterates
+        # it anyway, and select_related avoids a problem lookup per attempt
+        attempts = list(
+            Attempt.objects.filter(user_id=user_id).select_related('problem').order_by('created_at')
+        )
+
+        if not attempts:
             return {}
-        
+
         # Analyze patterns
         patterns = {
-            'total_attempts': attempts.count(),
-            'success_rate': attempts.filter(status='success').count() / attempts.count(),
+            'total_attempts': len(attempts),
+            'success_rate': sum(1 for a in attempts if a.status == 'success') / len(attempts),
             'average_attempts_per_problem': {},
             'preferred_hint_levels': {},
             'common_error_types': [],
@@ -1,271 +1,498 @@
 from django.shortcuts import render
+from django.http import StreamingHttpResponse
 from rest_framework import viewsets, status
 from rest_framework.decorators import action
 from rest_framework.response import Response
+from django.conf import settings
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models.signals import post_save
+from django.dispatch import receiver
+from django.db.models import F
+from django.db.models.functions import Least
 from django.utils import timezone
 from datetime import timedelta
 import logging
 import json
+import hashlib
+import threading
+import uuid
 
-from .models import Problem, Hint, Attempt, HintDelivery, HintEvaluation, UserProgress
-from .hint_chain import HintChain
+from .models import Problem, Hint, Attempt, HintDelivery, HintEvaluation, UserProgress, STUCK_FAILED_ATTEMPTS
 
 logger = logging.getLogger(__name__)
 
+# Shared HintChain instance - DRF builds a fresh ViewSet per request, and a
+# per-request HintChain would throw away the connection pool, response
+# cache stats, single-flight map and executor that are meant to be shared
+_hint_chain = None
+_hint_chain_lock = threading.Lock()
+
+def get_hint_chain():
+    """Return the process-wide HintChain, creating it on first use"""
+    global _hint_chain
+    if _hint_chain is None:
+        with _hint_chain_lock:
+            if _hint_chain is None:
+                # Imported here rather than at module top so loading the
+                # views (URL routing, migrations, management commands)
+                # doesn't pull in the LangChain/OpenAI stack - that cost
+                # is paid on the first hint request (or at startup when
+                # PRELOAD_HINT_CHAIN is set)
+                from .hint_chain import HintChain
+                _hint_chain = HintChain()
+    return _hint_chain
+
+# The five evaluation score fields, shared by HintEvaluation writes and
+# response payloads
+SCORE_KEYS = (
+    'safety_score',
+    'helpfulness_score',
+    'quality_score',
+    'progress_alignment_score',
+    'pedagogical_value_score'
+)
+
+# Whole-result cache for the LLM workflow, keyed on the problem, an exact
+# hash of the code snapshot and the requested hint level/type. A hit skips
+# every LLM roundtrip for repeat submissions of identical code
+HINT_RESULT_CACHE_TIMEOUT = 3600
+
+# How long async job results stay pollable after completion
+HINT_JOB_CACHE_TIMEOUT = 3600
+
+# Problem rows are effectively immutable after creation, so the read path
+# keeps a cached copy per user-facing problem_id and skips the SELECT
+PROBLEM_CACHE_TIMEOUT = 3600
+_PROBLEM_CACHE_FIELDS = ('id', 'title', 'problem_id', 'description', 'description_hash', 'difficulty')
+
+def _cache_problem(problem):
+    cache.set(
+        f'problem:{problem.problem_id}',
+        {field: getattr(problem, field) for field in _PROBLEM_CACHE_FIELDS},
+        timeout=PROBLEM_CACHE_TIMEOUT
+    )
+
+def _hint_content_hash(content):
+    """Digest used for constant-time duplicate-hint comparisons"""
+    return hashlib.blake2b(content.strip().encode(), digest_size=16).hexdigest()
+
+def _hint_result_cache_key(problem_id, user_code, hint_level, hint_type):
+    version = cache.get(f'hint_ver:{problem_id}', 0)
+    code_key = hashlib.blake2b(user_code.encode(), digest_size=16).hexdigest()
+    return f"hint:{problem_id}:v{version}:{code_key}:{hint_level}:{hint_type}"
+
+@receiver(post_save, sender=Problem)
+def _bump_hint_cache_version(sender, instance, **kwargs):
+    """Invalidate cached hint results and problem rows when a problem changes"""
+    cache.delete(f'problem:{instance.problem_id}')
+    try:
+        cache.incr(f'hint_ver:{instance.id}')
+    except ValueError:
+        cache.set(f'hint_ver:{instance.id}', 1, timeout=None)
+
 class HintViewSet(viewsets.ViewSet):
     def __init__(self, **kwargs):
         super().__init__(**kwargs)
-        logger.info("🚀 Initializing HintViewSet...")
-        self.hint_chain = HintChain()
-        logger.info("✅ HintViewSet initialized successfully")
+        self.hint_chain = get_hint_chain()
 
     def _get_or_create_problem(self, problem_id, problem_data=None):
         """Get existing problem or create new one if needed"""
-        logger.info(f"🔍 Looking up problem with ID: {problem_id}")
-        
-        # First try to get existing problem by user-provided problem_id
-        try:
-            problem = Problem.objects.get(problem_id=problem_id)
-            logger.info(f"✅ Found existing problem by problem_id: {problem.title}")
-            return problem
-        except Problem.DoesNotExist:
-            logger.info(f"❌ Problem {problem_id} not found by problem_id")
-        
-        # If problem doesn't exist and we have problem data, create it
+        logger.debug("🔍 Looking up problem with ID: %s", problem_id)
+
+        # With problem data we can resolve lookup + creation in one query
         if problem_data:
-            logger.info("📝 Creating new problem from provided data")
-            problem = Problem.objects.create(
+            problem, created = Problem.objects.get_or_create(
                 problem_id=problem_id,  # Store the user-provided problem_id
-                title=problem_data.get('title', 'Untitled Problem'),
-                description=problem_data.get('description', ''),
-                difficulty='medium'  # Set a default difficulty
+                defaults={
+                    'title': problem_data.get('title', 'Untitled Problem'),
+                    'description': problem_data.get('description', ''),
+                    'difficulty': 'medium'  # Set a default difficulty
+                }
             )
-            logger.info(f"✅ Created new problem: {problem.title} (problem_id: {problem.problem_id}, db_id: {problem.id})")
+            if created:
+                logger.info("✅ Created new problem: %s (problem_id: %s, db_id: %s)", problem.title, problem.problem_id, problem.id)
+            else:
+                logger.debug("✅ Found existing problem by problem_id: %s", problem.title)
+            _cache_problem(problem)
             return problem
-        
+
+        # Problem rows rarely change, so serve repeat lookups from cache
+        # (invalidated by the post_save receiver above)
+        fields = cache.get(f'problem:{problem_id}')
+        if fields is not None:
+            logger.debug("✅ Problem cache hit for problem_id: %s", problem_id)
+            return Problem(**fields)
+
+        problem = Problem.objects.filter(problem_id=problem_id).first()
+        if problem:
+            logger.debug("✅ Found existing problem by problem_id: %s", problem.title)
+            _cache_problem(problem)
+            return problem
+
         logger.warning("⚠️  No problem data provided and problem not found")
         return None
 
     def _get_user_progress(self, user_id, problem):
         """Get or create user progress"""
-        logger.info(f"👤 Getting user progress for user {user_id} on problem {problem.id}")
-        try:
-            progress = UserProgress.objects.get(
-                user_id=user_id,
-                problem=problem
-            )
-            logger.info(f"✅ Found existing progress: {progress.attempts_count} attempts, {progress.failed_attempts_count} failed")
-            return progress
-        except UserProgress.DoesNotExist:
-            logger.info("📝 Creating new user progress record")
-            progress = UserProgress.objects.create(
-                user_id=user_id,
-                problem=problem,
-                attempts_count=0,
-                failed_attempts_count=0,
-                current_hint_level=1
-            )
-            logger.info(f"✅ Created new progress record for user {user_id}")
-            return progress
-
-    def _get_previous_hints(self, user_id, problem):
-        """Get previous hints for this user and problem"""
-        logger.info(f"📚 Getting previous hints for user {user_id} on problem {problem.id}")
-        hints = HintDelivery.objects.filter(
+        logger.debug("👤 Getting user progress for user %s on problem %s", user_id, problem.id)
+        progress, created = UserProgress.objects.get_or_create(
+            user_id=user_id,
+            problem=problem,
+            defaults={
+                'attempts_count': 0,
+                'failed_attempts_count': 0,
+                'current_hint_level': 1
+            }
+        )
+        if created:
+            logger.info("✅ Created new progress record for user %s", user_id)
+        else:
+            logger.debug("✅ Found existing progress: %s attempts, %s failed", progress.attempts_count, progress.failed_attempts_count)
+        return progress
+
+    def _get_previous_hints(self, user_id, problem, limit=10):
+        """Get previous hint contents for this user and problem, newest first"""
+        logger.debug("📚 Getting previous hints for user %s on problem %s", user_id, problem.id)
+        # Only the hint text is ever consumed, so skip hydrating
+        # HintDelivery/Hint objects and fetch just the content column
+        return HintDelivery.objects.filter(
             user_id=user_id,
             hint__problem=problem
-        ).select_related('hint').order_by('-created_at')
-        logger.info(f"✅ Found {hints.count()} previous hints")
-        return hints
+        ).order_by('-created_at').values_list('hint__content', flat=True)[:limit]
 
     def _get_previous_attempts(self, user_id, problem):
         """Get previous attempts for the user on this problem"""
-        attempts = Attempt.objects.filter(
+        # Materialize once - logging via .count() would issue a separate
+        # COUNT query on top of the fetch. Only the metadata columns are
+        # consumed, so skip loading the code and evaluation blobs
+        attempts = list(Attempt.objects.filter(
             user_id=user_id,
             problem=problem
-        ).order_by('-created_at')
-        logger.info(f"✅ Found {attempts.count()} previous attempts")
+        ).only('id', 'status', 'created_at').order_by('-created_at'))
+        logger.debug("✅ Found %s previous attempts", len(attempts))
         return attempts
 
-    def _create_attempt(self, user_id: int, problem: Problem, user_code: str) -> Attempt:
-        """Create an attempt record for the user"""
-        logger.info(f"📝 Creating attempt record for user {user_id} on problem {problem.id}")
-        
-        # Evaluate the attempt
-        attempt_evaluation = self.hint_chain.evaluate_attempt_only(
-            problem_description=problem.description,
-            user_code=user_code
-        )
-        
-        # Create attempt record
-        attempt = Attempt.objects.create(
-            user_id=user_id,
-            problem=problem,
-            code=user_code,
-            status='failed' if not attempt_evaluation['success'] else 'success',
-            evaluation_details=attempt_evaluation
-        )
-        
-        logger.info(f"✅ Created attempt record (ID: {attempt.id}, Status: {attempt.status})")
-        return attempt
+    def _load_request_context(self, user_id, problem_id, problem_data=None):
+        """
+        Resolve the Problem and UserProgress rows for a request together.
+
+        The common case - known problem, returning user - is served by one
+        joined SELECT on UserProgress instead of separate problem and
+        progress lookups; creation paths fall back to the per-row helpers.
+        Returns a (problem, progress) pair, with both None when the problem
+        is unknown and no problem data was provided.
+        """
+        progress = UserProgress.get_with_problem(user_id, problem_id)
+        if progress is not None:
+            logger.debug("✅ Loaded problem and progress in one query for user %s", user_id)
+            return progress.problem, progress
 
-    @action(detail=False, methods=['post'])
-    def request_hint(self, request):
-        """Request a hint for a problem"""
-        logger.info("🎯 Received hint request")
-        logger.info(f"📥 Request data: {json.dumps(request.data, indent=2)}")
-        
-        user_id = request.data.get('user_id')
-        problem_id = request.data.get('problem_id')
-        user_code = request.data.get('user_code')
-        problem_data = request.data.get('problem_data')
+        problem = self._get_or_create_problem(problem_id, problem_data)
+        if not problem:
+            return None, None
+        return problem, self._get_user_progress(user_id, problem)
+
+    def _persist_hints(self, problem, user_id, attempt, hint_specs, is_auto_triggered=False):
+        """
+        Persist a batch of hints and their delivery records.
+
+        Uses bulk_create so N hints cost two INSERT statements instead of
+        2N - the current single-hint paths pass one-element lists, and a
+        future multi-candidate path gets batching for free. Returns the
+        created Hint instances in input order.
+        """
+        hints = Hint.objects.bulk_create([
+            Hint(problem=problem, content=content, level=level, hint_type=hint_type)
+            for content, level, hint_type in hint_specs
+        ])
+        HintDelivery.objects.bulk_create([
+            HintDelivery(
+                hint=hint, user_id=user_id, attempt=attempt,
+                is_auto_triggered=is_auto_triggered,
+                content_hash=_hint_content_hash(hint.content)
+            )
+            for hint in hints
+        ])
+        return hints
 
-        logger.info(f"📋 Request parameters:")
-        logger.info(f"   - User ID: {user_id}")
-        logger.info(f"   - Problem ID: {problem_id}")
-        logger.info(f"   - User code length: {len(user_code) if user_code else 0} characters")
-        logger.info(f"   - Problem data provided: {'✅ Yes' if problem_data else '❌ No'}")
+    def _is_duplicate_hint(self, user_id, problem, hint_content):
+        """Check whether this exact hint text was already delivered to the user"""
+        return HintDelivery.objects.filter(
+            user_id=user_id,
+            hint__problem=problem,
+            content_hash=_hint_content_hash(hint_content)
+        ).exists()
+
+    def _store_hint_evaluation(self, hint, result):
+        """
+        Persist the evaluation scores for a hint.
+
+        Returns the scores when they are already available (inline scores or
+        SYNC_EVALUATION), otherwise registers a callback that writes the
+        HintEvaluation row once the deferred LLM call finishes and returns
+        None so the response doesn't wait on it. Pending scores can be
+        fetched later via GET /api/hints/{hint_id}/evaluation/.
+        """
+        evaluation_scores = result.get('hint_evaluation')
+        evaluation_future = result.get('hint_evaluation_future')
+        if evaluation_scores is None and evaluation_future is None:
+            # Cached workflow result whose deferred scores were never
+            # captured - nothing to persist for this delivery
+            return None
+        if evaluation_scores is None and settings.SYNC_EVALUATION:
+            evaluation_scores = evaluation_future.result()
+
+        if evaluation_scores is not None:
+            scores = {key: evaluation_scores[key] for key in SCORE_KEYS}
+            hint_evaluation = HintEvaluation.objects.create(hint=hint, **scores)
+            logger.info("📝 Created hint evaluation record (ID: %s)", hint_evaluation.id)
+            return scores
+
+        hint_id = hint.id
+
+        def _write_evaluation(future):
+            try:
+                scores = future.result()
+                HintEvaluation.objects.create(
+                    hint_id=hint_id,
+                    **{key: scores[key] for key in SCORE_KEYS}
+                )
+                logger.info("📝 Created hint evaluation record in background for hint %s", hint_id)
+            except Exception as e:
+                logger.error("❌ Background hint evaluation failed for hint %s: %s", hint_id, e)
+
+        evaluation_future.add_done_callback(_write_evaluation)
+        logger.info("⏳ Hint evaluation for hint %s deferred to background", hint_id)
+        return None
 
-        if not all([user_id, problem_id, user_code]):
-            logger.error("❌ Missing required fields in request")
-            return Response(
-                {'error': 'Missing required fields'},
-                status=status.HTTP_400_BAD_REQUEST
-            )
+    @action(detail=True, methods=['get'])
+    def evaluation(self, request, pk=None):
+        """Fetch the evaluation scores for a hint once they are available"""
+        evaluation = HintEvaluation.objects.filter(hint_id=pk).order_by('-created_at').first()
+        if not evaluation:
+            return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+        return Response({
+            'status': 'ready',
+            'evaluation': {key: getattr(evaluation, key) for key in SCORE_KEYS}
+        })
 
-        # Get or create problem
-        problem = self._get_or_create_problem(problem_id, problem_data)
+    def _process_hint_request(self, user_id, problem_id, user_code, problem_data):
+        """
+        Full hint pipeline shared by request_hint and background jobs.
+
+        Returns a (payload, status_code) pair so callers can wrap it in a
+        Response or stash it in the job cache.
+        """
+        # Resolve problem + progress in one joined query where possible
+        problem, progress = self._load_request_context(user_id, problem_id, problem_data)
         if not problem:
             logger.error("❌ Problem not found and no problem data provided")
-            return Response(
+            return (
                 {'error': 'Problem not found and no problem data provided'},
-                status=status.HTTP_404_NOT_FOUND
+                status.HTTP_404_NOT_FOUND
             )
 
-        # Get or create user progress
-        progress = self._get_user_progress(user_id, problem)
-        
-        # Increment attempts count
-        progress.attempts_count += 1
-        logger.info(f"📈 Incremented attempts count: {progress.attempts_count}")
-        
+        # One timestamp for the whole pre-LLM phase so the elapsed-time
+        # calculation and the activity write are coherent
+        now = timezone.now()
+
         # Calculate time since last attempt
         time_since_last_attempt = 0
         if progress.last_activity:
-            time_since_last_attempt = (timezone.now() - progress.last_activity).total_seconds()
-            logger.info(f"⏱️  Time since last attempt: {time_since_last_attempt:.2f} seconds")
-        progress.last_activity = timezone.now()
-        progress.save()
-        logger.info("💾 User progress saved")
-
-        # Escalate hint level if user is inactive for 5+ minutes
+            time_since_last_attempt = (now - progress.last_activity).total_seconds()
+            logger.info("⏱️  Time since last attempt: %.2f seconds", time_since_last_attempt)
+
+        # Single UPDATE using F() expressions so concurrent requests can't
+        # lose increments (read-modify-write on the instance is racy)
+        update_kwargs = {
+            'attempts_count': F('attempts_count') + 1,
+            'last_activity': now
+        }
         if time_since_last_attempt > 300:
             logger.info("⏫ User inactive for 5+ minutes, escalating hint level")
-            progress.current_hint_level = min(progress.current_hint_level + 1, 5)
-            progress.save()
+            update_kwargs['current_hint_level'] = Least(F('current_hint_level') + 1, 5)
+        UserProgress.objects.filter(pk=progress.pk).update(**update_kwargs)
+        progress.refresh_from_db(fields=['attempts_count', 'current_hint_level', 'last_activity'])
+        logger.info("📈 Incremented attempts count: %s", progress.attempts_count)
 
-        # Get previous hints (last 5)
-        previous_hints = list(self._get_previous_hints(user_id, problem)[:5])
-        previous_hints_text = [hint.hint.content for hint in previous_hints]
+        code_hash = hashlib.blake2b(user_code.encode(), digest_size=16).hexdigest()
 
-        # Prepare input for the chain
-        chain_input = {
-            "problem_description": problem.description,
-            "user_code": user_code,
-            "attempts_count": progress.attempts_count,
-            "failed_attempts_count": progress.failed_attempts_count,
-            "current_hint_level": progress.current_hint_level,
-            "time_since_last_attempt": time_since_last_attempt,
-            "previous_hints": previous_hints_text,
-            "hint_level": progress.current_hint_level,
-            "hint_type": "conceptual",
-            "user_id": user_id,
-            "problem_id": problem.id
-        }
+        # Whole-result cache: an identical code snapshot at the same level
+        # and type reuses the prior workflow result with zero LLM roundtrips
+        result_cache_key = _hint_result_cache_key(
+            problem.id, user_code, progress.current_hint_level, 'conceptual'
+        )
+        result = cache.get(result_cache_key)
+        if (
+            result is not None
+            and not result['attempt_evaluation'].get('success')
+            and self._is_duplicate_hint(user_id, problem, result['generated_hint'])
+        ):
+            # The cache is shared across users; replaying a hint this user
+            # already received defeats the point of asking again, so treat
+            # it as a miss and generate fresh
+            logger.info("♻️  Cached hint already delivered to this user - regenerating")
+            result = None
+        if result is not None:
+            logger.info("✅ Hint result cache hit - skipping LLM workflow")
+        else:
+            # If the code is byte-identical to the previous submission,
+            # reuse the stored evaluation instead of calling the LLM again
+            reused_attempt_evaluation = None
+            if code_hash == progress.last_code_hash:
+                reused_attempt_evaluation = Attempt.objects.filter(
+                    user_id=user_id, problem=problem
+                ).order_by('-created_at').values_list('evaluation_details', flat=True).first()
+                if reused_attempt_evaluation:
+                    logger.info("✅ Code unchanged since last attempt - reusing its evaluation")
+
+            # Kick off the attempt-evaluation LLM call now so its roundtrip
+            # overlaps with the previous-hints DB work below (the single-call
+            # workflow evaluates inside its one prompt instead)
+            attempt_eval_future = None
+            if reused_attempt_evaluation is None and not settings.SINGLE_CALL_WORKFLOW:
+                attempt_eval_future = self.hint_chain.submit_attempt_evaluation(
+                    problem.description, user_code
+                )
+
+            # Get previous hints (last 5), deduplicated and truncated so prompt
+            # size stays bounded regardless of how long the user has been at it
+            if progress.attempts_count <= 1 and progress.current_hint_level == 1:
+                # First request for this user+problem - no prior hints by definition
+                previous_hints_text = []
+            else:
+                previous_hints_text = list(dict.fromkeys(
+                    h[:500] for h in self._get_previous_hints(user_id, problem, limit=5)
+                ))
 
-        # Run the full workflow chain
-        logger.info("🔄 Running HintChain workflow...")
-        result = self.hint_chain.process_hint_request(chain_input)
+            # Prepare input for the chain
+            chain_input = {
+                "problem_description": problem.description,
+                "user_code": user_code,
+                "attempts_count": progress.attempts_count,
+                "failed_attempts_count": progress.failed_attempts_count,
+                "current_hint_level": progress.current_hint_level,
+                "time_since_last_attempt": time_since_last_attempt,
+                "previous_hints": previous_hints_text,
+                "hint_level": progress.current_hint_level,
+                "hint_type": "conceptual",
+                "user_id": user_id,
+                "problem_id": problem.id,
+                "defer_hint_evaluation": True,
+                "attempt_evaluation": reused_attempt_evaluation,
+                "attempt_evaluation_future": attempt_eval_future,
+                # With delivered hints on record a duplicate is possible, so
+                # have the chain sample a spare candidate in parallel
+                "hint_candidates": 2 if previous_hints_text else 1
+            }
+
+            # Run the full workflow chain (single-call variant collapses the
+            # three LLM roundtrips into one when enabled)
+            logger.info("🔄 Running HintChain workflow...")
+            if settings.SINGLE_CALL_WORKFLOW:
+                process = self.hint_chain.process_hint_request_single_call
+            else:
+                process = self.hint_chain.process_hint_request
+            result = process(chain_input)
+
+            # Check for duplicate hint via the indexed content hash - one
+            # constant-size comparison covering the whole delivery history
+            # instead of string equality against the last hint only.
+            # Successful attempts get the workflow's static acknowledgement,
+            # which repeats by design - don't regenerate over it
+            if (
+                previous_hints_text
+                and not result['attempt_evaluation'].get('success')
+                and self._is_duplicate_hint(user_id, problem, result['generated_hint'])
+            ):
+                replacement = next(
+                    (c for c in result.get('hint_candidates', [])
+                     if not self._is_duplicate_hint(user_id, problem, c['hint'])),
+                    None
+                )
+                if replacement is not None:
+                    # A spare candidate was sampled in parallel with the
+                    # primary call - swap it in without another roundtrip
+                    logger.info("♻️  Primary hint was a duplicate, using the spare candidate")
+                    result = {k: v for k, v in result.items()
+                              if k not in ('hint_evaluation', 'hint_evaluation_future')}
+                    result['generated_hint'] = replacement['hint']
+                    if replacement['scores'] is not None:
+                        result['hint_evaluation'] = replacement['scores']
+                else:
+                    logger.warning("⚠️  Generated hint was already delivered to this user. Regenerating once...")
+                    result = process(chain_input)
+                    if self._is_duplicate_hint(user_id, problem, result['generated_hint']):
+                        logger.warning("⚠️  Still duplicate after regeneration. Delivering as is.")
+
+            # Cache everything except the non-serializable evaluation future
+            cache.set(
+                result_cache_key,
+                {k: v for k, v in result.items() if k != 'hint_evaluation_future'},
+                timeout=HINT_RESULT_CACHE_TIMEOUT
+            )
 
         # Get updated hint level and type from the chain result
         new_hint_level = result.get('updated_hint_level', progress.current_hint_level)
         new_hint_type = result.get('updated_hint_type', 'conceptual')
+        attempt_succeeded = result['attempt_evaluation']['success']
 
-        # Check for duplicate hint (avoid delivering same hint as last time)
-        if previous_hints_text and result['generated_hint'].strip() == previous_hints_text[0].strip():
-            logger.warning("⚠️  Generated hint is a duplicate of the last delivered hint. Regenerating once...")
-            # Try regenerating once
-            result = self.hint_chain.process_hint_request(chain_input)
-            if result['generated_hint'].strip() == previous_hints_text[0].strip():
-                logger.warning("⚠️  Still duplicate after regeneration. Delivering as is.")
-
-        # Update user progress with new hint level
-        if new_hint_level != progress.current_hint_level:
-            logger.info(f"📈 Updating hint level: {progress.current_hint_level} → {new_hint_level}")
-            progress.current_hint_level = new_hint_level
-            progress.save()
-
-        # Create attempt record
-        attempt = Attempt.objects.create(
-            user_id=user_id,
-            problem=problem,
-            code=user_code,
-            status='failed' if not result['attempt_evaluation']['success'] else 'success',
-            evaluation_details=result['attempt_evaluation']
-        )
-        logger.info(f"📝 Created attempt record (ID: {attempt.id}, Status: {attempt.status})")
-
-        # Update failed_attempts_count only if failed, reset on success
-        if not result['attempt_evaluation']['success']:
-            progress.failed_attempts_count += 1
-            logger.info(f"❌ Incremented failed_attempts_count: {progress.failed_attempts_count}")
-        else:
-            progress.failed_attempts_count = 0
-            logger.info(f"✅ Reset failed_attempts_count to 0 (success)")
-        progress.save()
+        # Persist all request records in a single transaction (one commit
+        # instead of one per INSERT)
+        with transaction.atomic():
+            # Create attempt record
+            attempt = Attempt.objects.create(
+                user_id=user_id,
+                problem=problem,
+                code=user_code,
+                status='success' if attempt_succeeded else 'failed',
+                evaluation_details=result['attempt_evaluation'],
+                error_pattern=(result['attempt_evaluation'].get('error_pattern') or '')[:200],
+                error_category=(result['attempt_evaluation'].get('error_category') or '')[:100]
+            )
+            logger.info("📝 Created attempt record (ID: %s, Status: %s)", attempt.id, attempt.status)
+
+            # One atomic UPDATE for the chain-derived hint level and the
+            # failure counter (F() increment on failure, reset on success)
+            if not attempt_succeeded:
+                failed_attempts = F('failed_attempts_count') + 1
+                logger.info("❌ Incrementing failed_attempts_count")
+            else:
+                failed_attempts = 0
+                logger.info("✅ Resetting failed_attempts_count to 0 (success)")
+            UserProgress.objects.filter(pk=progress.pk).update(
+                current_hint_level=new_hint_level,
+                failed_attempts_count=failed_attempts,
+                last_code_hash=code_hash,
+                last_activity=timezone.now()
+            )
+            progress.refresh_from_db(fields=['current_hint_level', 'failed_attempts_count', 'last_activity'])
 
-        # Create hint record with updated level and type
-        hint = Hint.objects.create(
-            problem=problem,
-            content=result['generated_hint'],
-            level=new_hint_level,  # Use updated level
-            hint_type=new_hint_type  # Use updated type
-        )
-        logger.info(f"📝 Created hint record (ID: {hint.id}, Level: {hint.level}, Type: {hint.hint_type})")
-
-        # Create hint evaluation record
-        hint_evaluation = HintEvaluation.objects.create(
-            hint=hint,
-            safety_score=result['hint_evaluation']['safety_score'],
-            helpfulness_score=result['hint_evaluation']['helpfulness_score'],
-            quality_score=result['hint_evaluation']['quality_score'],
-            progress_alignment_score=result['hint_evaluation']['progress_alignment_score'],
-            pedagogical_value_score=result['hint_evaluation']['pedagogical_value_score']
-        )
-        logger.info(f"📝 Created hint evaluation record (ID: {hint_evaluation.id})")
+            # Create hint and delivery records with updated level and type
+            hint = self._persist_hints(
+                problem, user_id, attempt,
+                [(result['generated_hint'], new_hint_level, new_hint_type)]
+            )[0]
+            logger.info("📝 Created hint and delivery records (hint ID: %s, Level: %s, Type: %s)", hint.id, hint.level, hint.hint_type)
 
-        # Create hint delivery record
-        hint_delivery = HintDelivery.objects.create(
-            hint=hint,
-            user_id=user_id,
-            attempt=attempt,
-            is_auto_triggered=False
-        )
-        logger.info(f"📝 Created hint delivery record (ID: {hint_delivery.id})")
+        # Persist the hint evaluation - either synchronously (SYNC_EVALUATION)
+        # or in the background so the hint ships without waiting on the scores
+        evaluation_scores = self._store_hint_evaluation(hint, result)
 
         # Prepare response in the requested format
         response_data = {
-            'status': 'success' if result['attempt_evaluation']['success'] else 'failed',
+            'status': 'success' if attempt_succeeded else 'failed',
             'hint': {
                 'id': hint.id,
                 'content': result['generated_hint'],
                 'level': new_hint_level,
                 'type': new_hint_type
             },
-            'evaluation': result['hint_evaluation'],
+            'evaluation': evaluation_scores,
             'attempt_id': attempt.id,
             'attempt_evaluation': {
-                'success': result['attempt_evaluation']['success'],
+                'success': attempt_succeeded,
                 'reason': result['attempt_evaluation']['reason'],
                 'complexity': result['attempt_evaluation']['complexity'],
                 'edge_cases': result['attempt_evaluation']['edge_cases']
@@ -280,14 +507,131 @@ class HintViewSet(viewsets.ViewSet):
         }
         
         logger.info("🎉 Hint request completed successfully")
-        logger.info(f"📤 Sending response: {json.dumps(response_data, indent=2)}")
-        logger.info(f"🎯 Final hint level: {new_hint_level}, type: {new_hint_type}")
-        
-        return Response(response_data)
+        if logger.isEnabledFor(logging.DEBUG):
+            # json.dumps on the full payload is only worth paying for when
+            # someone is actually reading debug logs
+            logger.debug("📤 Sending response: %s", json.dumps(response_data, indent=2))
+        logger.info("🎯 Final hint level: %s, type: %s", new_hint_level, new_hint_type)
+
+        return response_data, status.HTTP_200_OK
+
+    def _validate_hint_request(self, request):
+        """Extract and validate the common hint request fields"""
+        user_id = request.data.get('user_id')
+        problem_id = request.data.get('problem_id')
+        user_code = request.data.get('user_code')
+        problem_data = request.data.get('problem_data')
+
+        logger.info("📋 Request parameters:")
+        logger.info("   - User ID: %s", user_id)
+        logger.info("   - Problem ID: %s", problem_id)
+        logger.info("   - User code length: %s characters", len(user_code) if user_code else 0)
+        logger.info("   - Problem data provided: %s", '✅ Yes' if problem_data else '❌ No')
+
+        return user_id, problem_id, user_code, problem_data
 
     @action(detail=False, methods=['post'])
-    def check_auto_trigger(self, request):
-        """Check if a hint should be auto-triggered"""
+    def request_hint(self, request):
+        """Request a hint for a problem"""
+        logger.info("🎯 Received hint request")
+        if logger.isEnabledFor(logging.DEBUG):
+            logger.debug("📥 Request data: %s", json.dumps(request.data, indent=2))
+
+        user_id, problem_id, user_code, problem_data = self._validate_hint_request(request)
+        if not all([user_id, problem_id, user_code]):
+            logger.error("❌ Missing required fields in request")
+            return Response(
+                {'error': 'Missing required fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        payload, status_code = self._process_hint_request(
+            user_id, problem_id, user_code, problem_data
+        )
+        return Response(payload, status=status_code)
+
+    @action(detail=False, methods=['post'])
+    def request_hint_async(self, request):
+        """
+        Enqueue a hint request and return a job id immediately.
+
+        The pipeline runs on the workflow executor so no gunicorn worker
+        is pinned for the multi-second LLM latency; clients poll
+        hint_status (or rely on the WebSocket channel) for the result.
+        The job must not run on the leaf-task executor - the pipeline
+        submits nested tasks there and blocks on them, so jobs sharing
+        that pool deadlock it once all workers hold a blocked job.
+        """
+        logger.info("🎯 Received async hint request")
+
+        user_id, problem_id, user_code, problem_data = self._validate_hint_request(request)
+        if not all([user_id, problem_id, user_code]):
+            logger.error("❌ Missing required fields in request")
+            return Response(
+                {'error': 'Missing required fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job_id = uuid.uuid4().hex
+        cache.set(f'hintjob:{job_id}', {'status': 'pending'}, timeout=HINT_JOB_CACHE_TIMEOUT)
+
+        def run_job():
+            try:
+                payload, status_code = self._process_hint_request(
+                    user_id, problem_id, user_code, problem_data
+                )
+                state = 'ready' if status_code == status.HTTP_200_OK else 'error'
+                cache.set(
+                    f'hintjob:{job_id}',
+                    {'status': state, 'result': payload},
+                    timeout=HINT_JOB_CACHE_TIMEOUT
+                )
+            except Exception as e:
+                logger.error("❌ Hint job %s failed: %s", job_id, e)
+                cache.set(
+                    f'hintjob:{job_id}',
+                    {'status': 'error', 'result': {'error': 'Hint generation failed'}},
+                    timeout=HINT_JOB_CACHE_TIMEOUT
+                )
+
+        self.hint_chain.workflow_executor.submit(run_job)
+        logger.info("⏳ Hint job %s enqueued", job_id)
+        return Response(
+            {'status': 'pending', 'job_id': job_id},
+            status=status.HTTP_202_ACCEPTED
+        )
+
+    @action(detail=False, methods=['get'])
+    def hint_status(self, request):
+        """Poll the status of a hint job started via request_hint_async"""
+        job_id = request.query_params.get('job_id')
+        if not job_id:
+            return Response(
+                {'error': 'Missing job_id'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        job = cache.get(f'hintjob:{job_id}')
+        if job is None:
+            return Response(
+                {'error': 'Unknown or expired job_id'},
+                status=status.HTTP_404_NOT_FOUND
+            )
+        if job['status'] == 'pending':
+            return Response({'status': 'pending'}, status=status.HTTP_202_ACCEPTED)
+        return Response({'status': job['status'], 'result': job.get('result')})
+
+    @action(detail=False, methods=['post'])
+    def stream_hint(self, request):
+        """
+        Stream a hint back as Server-Sent Events instead of buffering the
+        full completion - the client sees the first tokens in well under a
+        second while total generation time is unchanged. Records are
+        persisted only after the stream closes, so a broken stream leaves
+        no partial hint behind.
+        """
+        logger.info("🌊 Received streaming hint request")
+
         user_id = request.data.get('user_id')
         problem_id = request.data.get('problem_id')
         user_code = request.data.get('user_code')
@@ -299,7 +643,6 @@ class HintViewSet(viewsets.ViewSet):
                 status=status.HTTP_400_BAD_REQUEST
             )
 
-        # Get or create problem
         problem = self._get_or_create_problem(problem_id, problem_data)
         if not problem:
             return Response(
@@ -307,30 +650,211 @@ class HintViewSet(viewsets.ViewSet):
                 status=status.HTTP_404_NOT_FOUND
             )
 
-        # Get user progress
         progress = self._get_user_progress(user_id, problem)
-        
-        # Check if user is stuck
-        if progress.is_stuck():
-            # Create attempt record
-            attempt = self._create_attempt(user_id, problem, user_code)
-            
-            # Get previous hints (last 5)
-            previous_hints = list(self._get_previous_hints(user_id, problem)[:5])
-            previous_hints_text = [delivery.hint.content for delivery in previous_hints]
+        progress.attempts_count += 1
+
+        time_since_last_attempt = 0
+        if progress.last_activity:
+            time_since_last_attempt = (timezone.now() - progress.last_activity).total_seconds()
+        if time_since_last_attempt > 300:
+            progress.current_hint_level = min(progress.current_hint_level + 1, 5)
+        progress.save(update_fields=['attempts_count', 'current_hint_level', 'last_activity'])
+
+        previous_hints_text = list(dict.fromkeys(
+            h[:500] for h in self._get_previous_hints(user_id, problem, limit=5)
+        ))
+
+        chain_input = {
+            "problem_description": problem.description,
+            "user_code": user_code,
+            "attempts_count": progress.attempts_count,
+            "failed_attempts_count": progress.failed_attempts_count,
+            "current_hint_level": progress.current_hint_level,
+            "time_since_last_attempt": time_since_last_attempt,
+            "previous_hints": previous_hints_text,
+            "hint_level": progress.current_hint_level,
+            "hint_type": "conceptual"
+        }
+        hint_level = progress.current_hint_level
+
+        def event_stream():
+            chunks = []
+            try:
+                for chunk in self.hint_chain.stream_hint_generation(chain_input):
+                    chunks.append(chunk)
+                    yield f"data: {json.dumps({'delta': chunk})}\n\n"
+            except Exception as e:
+                logger.error("❌ Streaming hint generation failed: %s", e)
+                yield f"data: {json.dumps({'error': 'Hint generation failed'})}\n\n"
+                return
+
+            hint_content = ''.join(chunks).strip()
+            if not hint_content:
+                yield f"data: {json.dumps({'error': 'Empty hint generated'})}\n\n"
+                return
+
+            # Persist only after the complete hint has been streamed
+            with transaction.atomic():
+                attempt = Attempt.objects.create(
+                    user_id=user_id,
+                    problem=problem,
+                    code=user_code,
+                    status='pending'
+                )
+                hint = Hint.objects.create(
+                    problem=problem,
+                    content=hint_content,
+                    level=hint_level,
+                    hint_type='conceptual'
+                )
+                HintDelivery.objects.create(
+                    hint=hint,
+                    user_id=user_id,
+                    attempt=attempt,
+                    is_auto_triggered=False,
+                    content_hash=_hint_content_hash(hint_content)
+                )
+            logger.info("📝 Streamed hint persisted (ID: %s)", hint.id)
+
+            # Score the streamed hint in the background; the result lands in
+            # HintEvaluation and is pollable via the evaluation endpoint
+            eval_future = self.hint_chain.submit_hint_evaluation({
+                "problem_description": problem.description,
+                "user_code": user_code,
+                "attempts_count": progress.attempts_count,
+                "failed_attempts_count": progress.failed_attempts_count,
+                "current_hint_level": hint_level,
+                "time_since_last_attempt": time_since_last_attempt,
+                "previous_hints": previous_hints_text,
+                "hint_content": hint_content
+            })
+            self._store_hint_evaluation(hint, {'hint_evaluation_future': eval_future})
+
+            yield f"data: {json.dumps({'done': True, 'hint_id': hint.id, 'level': hint.level})}\n\n"
+
+        response = StreamingHttpResponse(event_stream(), content_type='text/event-stream')
+        response['Cache-Control'] = 'no-cache'
+        response['X-Accel-Buffering'] = 'no'
+        return response
+
+    @action(detail=False, methods=['post'])
+    def check_auto_trigger(self, request):
+        """Check if a hint should be auto-triggered"""
+        user_id = request.data.get('user_id')
+        problem_id = request.data.get('problem_id')
+        user_code = request.data.get('user_code')
+        problem_data = request.data.get('problem_data')
+
+        if not all([user_id, problem_id, user_code]):
+            return Response(
+                {'error': 'Missing required fields'},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        # Fast path: polling frontends call this every few seconds, so a
+        # recent "not stuck" verdict is replayed from cache without any
+        # database work
+        not_stuck_cache_key = f'autotrigger_notstuck:{user_id}:{problem_id}'
+        cached_not_stuck = cache.get(not_stuck_cache_key)
+        if cached_not_stuck is not None:
+            return Response(cached_not_stuck)
+
+        # One joined SELECT covers the common polling case: known problem,
+        # existing progress. This stays read-only - a stuck check must not
+        # create rows
+        progress = UserProgress.get_with_problem(user_id, problem_id)
+        if progress is not None:
+            problem = progress.problem
+        else:
+            problem = self._get_or_create_problem(problem_id, problem_data)
+            if not problem:
+                return Response(
+                    {'error': 'Problem not found and no problem data provided'},
+                    status=status.HTTP_404_NOT_FOUND
+                )
+            # No progress row means no attempts yet, so the user can't be stuck
+            payload = {
+                'should_trigger': False,
+                'user_progress': {
+                    'attempts_count': 0,
+                    'failed_attempts_count': 0,
+                    'current_hint_level': 1,
+                    'is_stuck': False
+                }
+            }
+            cache.set(not_stuck_cache_key, payload, timeout=30)
+            return Response(payload)
+
+
+        # Check if user is stuck - computed once and reused in the response
+        # payloads below (each call redoes the timezone/timedelta math)
+        is_stuck = progress.is_stuck()
+
+        # One timestamp for the whole handler - the debounce window and
+        # the elapsed-time calculation below share it
+        now = timezone.now()
+
+        # Debounce: polling frontends can call this every few seconds -
+        # if an auto-triggered hint already went out in the last minute,
+        # replay it instead of rerunning the whole LLM pipeline. This must
+        # run before the stuck gate: the delivery transaction below
+        # refreshes last_activity, which keeps is_stuck() False for the
+        # entire window, so a gated check would never fire after a
+        # delivery. The failed-attempts counter survives the delivery and
+        # keeps the query away from users who were never close to stuck
+        if progress.failed_attempts_count >= STUCK_FAILED_ATTEMPTS:
+            recent_delivery = HintDelivery.objects.filter(
+                user_id=user_id,
+                hint__problem=problem,
+                is_auto_triggered=True,
+                created_at__gte=now - timedelta(seconds=60)
+            ).select_related('hint').order_by('-created_at').first()
+            if recent_delivery:
+                logger.info("⏲️  Auto-triggered hint delivered recently, replaying it")
+                return Response({
+                    'should_trigger': True,
+                    'replayed': True,
+                    'hint': {
+                        'id': recent_delivery.hint.id,
+                        'content': recent_delivery.hint.content,
+                        'level': recent_delivery.hint.level,
+                        'type': recent_delivery.hint.hint_type
+                    },
+                    'evaluation': None,
+                    'attempt_id': recent_delivery.attempt_id,
+                    'user_progress': {
+                        'attempts_count': progress.attempts_count,
+                        'failed_attempts_count': progress.failed_attempts_count,
+                        'current_hint_level': progress.current_hint_level,
+                        'is_stuck': is_stuck
+                    }
+                })
+
+        if is_stuck:
+            # Start the attempt evaluation now so its LLM roundtrip overlaps
+            # the history queries below; the workflow consumes the same
+            # future instead of evaluating a second time
+            attempt_eval_future = self.hint_chain.submit_attempt_evaluation(
+                problem.description, user_code
+            )
+
+            # Get previous hints (last 5), deduplicated and truncated to
+            # keep the prompt size bounded
+            previous_hints_text = list(dict.fromkeys(
+                h[:500] for h in self._get_previous_hints(user_id, problem, limit=5)
+            ))
 
             # Calculate time since last attempt
             time_since_last_attempt = 0
             if progress.last_activity:
-                time_since_last_attempt = (timezone.now() - progress.last_activity).total_seconds()
-            progress.last_activity = timezone.now()
-            progress.save()
+                time_since_last_attempt = (now - progress.last_activity).total_seconds()
 
-            # Escalate hint level if user is inactive for 5+ minutes
+            # Escalate hint level if user is inactive for 5+ minutes; kept
+            # in memory here and persisted with the final level in the one
+            # UPDATE inside the transaction below
             if time_since_last_attempt > 300:
                 logger.info("⏫ User inactive for 5+ minutes, escalating hint level")
                 progress.current_hint_level = min(progress.current_hint_level + 1, 5)
-                progress.save()
 
             # Prepare input for the chain
             chain_input = {
@@ -342,53 +866,63 @@ class HintViewSet(viewsets.ViewSet):
                 "time_since_last_attempt": time_since_last_attempt,
                 "previous_hints": previous_hints_text,
                 "hint_level": progress.current_hint_level,
-                "hint_type": "conceptual"
+                "hint_type": "conceptual",
+                "defer_hint_evaluation": True,
+                "attempt_evaluation_future": attempt_eval_future
             }
 
             # Run the full workflow chain for auto-trigger
             logger.info("🔄 Running auto-trigger workflow...")
             result = self.hint_chain.process_hint_request(chain_input)
-
-            # Check for duplicate hint (avoid delivering same hint as last time)
-            if previous_hints_text and result['generated_hint'].strip() == previous_hints_text[0].strip():
-                logger.warning("⚠️  Generated hint is a duplicate of the last delivered hint. Regenerating once...")
+            attempt_evaluation = result['attempt_evaluation']
+
+            # Check for duplicate hint via the indexed content hash; the
+            # static success acknowledgement repeats by design
+            if (
+                previous_hints_text
+                and not attempt_evaluation.get('success')
+                and self._is_duplicate_hint(user_id, problem, result['generated_hint'])
+            ):
+                logger.warning("⚠️  Generated hint was already delivered to this user. Regenerating once...")
                 result = self.hint_chain.process_hint_request(chain_input)
-                if result['generated_hint'].strip() == previous_hints_text[0].strip():
+                if self._is_duplicate_hint(user_id, problem, result['generated_hint']):
                     logger.warning("⚠️  Still duplicate after regeneration. Delivering as is.")
 
             # Get updated hint level and type from the chain result
             new_hint_level = result.get('updated_hint_level', progress.current_hint_level)
             new_hint_type = result.get('updated_hint_type', 'conceptual')
 
-            # Create hint
-            hint = Hint.objects.create(
-                problem=problem,
-                content=result['generated_hint'],
-                level=new_hint_level,
-                hint_type=new_hint_type
-            )
-
-            # Create hint delivery
-            HintDelivery.objects.create(
-                hint=hint,
-                user_id=user_id,
-                attempt=attempt,
-                is_auto_triggered=True
-            )
-
-            # Create evaluation record
-            HintEvaluation.objects.create(
-                hint=hint,
-                safety_score=result['hint_evaluation']['safety_score'],
-                helpfulness_score=result['hint_evaluation']['helpfulness_score'],
-                quality_score=result['hint_evaluation']['quality_score'],
-                progress_alignment_score=result['hint_evaluation']['progress_alignment_score'],
-                pedagogical_value_score=result['hint_evaluation']['pedagogical_value_score']
-            )
-
-            # Update user progress
-            progress.current_hint_level = new_hint_level
-            progress.save()
+            # Persist the auto-trigger records in a single transaction
+            with transaction.atomic():
+                # Create attempt record
+                attempt = Attempt.objects.create(
+                    user_id=user_id,
+                    problem=problem,
+                    code=user_code,
+                    status='success' if attempt_evaluation['success'] else 'failed',
+                    evaluation_details=attempt_evaluation,
+                    error_pattern=(attempt_evaluation.get('error_pattern') or '')[:200],
+                    error_category=(attempt_evaluation.get('error_category') or '')[:100]
+                )
+                logger.info("📝 Created attempt record (ID: %s, Status: %s)", attempt.id, attempt.status)
+
+                # Create hint and delivery records
+                hint = self._persist_hints(
+                    problem, user_id, attempt,
+                    [(result['generated_hint'], new_hint_level, new_hint_type)],
+                    is_auto_triggered=True
+                )[0]
+
+                # Single UPDATE covering the escalated/chain-derived level
+                # and the activity timestamp
+                UserProgress.objects.filter(pk=progress.pk).update(
+                    current_hint_level=new_hint_level,
+                    last_activity=timezone.now()
+                )
+                progress.current_hint_level = new_hint_level
+
+            # Persist the evaluation synchronously or in the background
+            evaluation_scores = self._store_hint_evaluation(hint, result)
 
             return Response({
                 'should_trigger': True,
@@ -398,31 +932,27 @@ class HintViewSet(viewsets.ViewSet):
                     'level': hint.level,
                     'type': hint.hint_type
                 },
-                'evaluation': {
-                    'safety_score': result['hint_evaluation']['safety_score'],
-                    'helpfulness_score': result['hint_evaluation']['helpfulness_score'],
-                    'quality_score': result['hint_evaluation']['quality_score'],
-                    'progress_alignment_score': result['hint_evaluation']['progress_alignment_score'],
-                    'pedagogical_value_score': result['hint_evaluation']['pedagogical_value_score']
-                },
+                'evaluation': evaluation_scores,
                 'attempt_id': attempt.id,
                 'user_progress': {
                     'attempts_count': progress.attempts_count,
                     'failed_attempts_count': progress.failed_attempts_count,
                     'current_hint_level': progress.current_hint_level,
-                    'is_stuck': progress.is_stuck()
+                    'is_stuck': is_stuck
                 }
             })
 
-        return Response({
+        payload = {
             'should_trigger': False,
             'user_progress': {
                 'attempts_count': progress.attempts_count,
                 'failed_attempts_count': progress.failed_attempts_count,
                 'current_hint_level': progress.current_hint_level,
-                'is_stuck': progress.is_stuck()
+                'is_stuck': is_stuck
             }
-        })
+        }
+        cache.set(not_stuck_cache_key, payload, timeout=30)
+        return Response(payload)
 
     @action(detail=True, methods=['post'])
     def provide_feedback(self, request, pk=None):